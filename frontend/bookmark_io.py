@@ -0,0 +1,173 @@
+"""Streaming import/export of bookmarks in the Netscape HTML and Chromium JSON formats.
+
+The readers are generators that parse the file a chunk at a time and yield
+{"url": ..., "title": ...} dicts, so large files are never held in memory as a
+whole. Both accept a progress callback called with (bytes_read, total_bytes).
+"""
+import html
+import json
+import os
+import re
+import time
+from html.parser import HTMLParser
+
+CHUNK_SIZE = 1 << 16
+IMPORTABLE_SCHEMES = ("http:", "https:", "ftp:", "file:")
+
+# Seconds between 1601-01-01 (Chromium's epoch) and 1970-01-01
+CHROME_EPOCH_OFFSET = 11644473600
+
+
+def is_importable(url):
+    """Skip bookmarklets, Firefox place: queries and other non-page URLs"""
+    return url.lower().startswith(IMPORTABLE_SCHEMES)
+
+
+def read_chunks(path, progress=None):
+    total = os.path.getsize(path)
+    done = 0
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            done = min(total, done + len(chunk.encode("utf-8", errors="replace")))
+            yield chunk
+            if progress:
+                progress(done, total)
+
+
+class NetscapeBookmarkParser(HTMLParser):
+    """Collects <A HREF=...>title</A> entries as they are fed"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.found = []
+        self.href = None
+        self.title_parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            self.href = dict(attrs).get("href")
+            self.title_parts = []
+
+    def handle_data(self, data):
+        if self.href is not None:
+            self.title_parts.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self.href is not None:
+            title = "".join(self.title_parts).strip()
+            self.found.append({"url": self.href, "title": title or self.href})
+            self.href = None
+
+
+def iter_netscape_bookmarks(path, progress=None):
+    """Bookmarks from a Netscape bookmark file (the HTML export of every major browser)"""
+    parser = NetscapeBookmarkParser()
+    for chunk in read_chunks(path, progress):
+        parser.feed(chunk)
+        found, parser.found = parser.found, []
+        for bm in found:
+            if is_importable(bm["url"]):
+                yield bm
+    parser.close()
+    for bm in parser.found:
+        if is_importable(bm["url"]):
+            yield bm
+
+
+# A complete JSON string, a structural character, or the opening quote of a
+# string that continues in the next chunk
+JSON_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[]|"')
+
+
+def iter_chrome_bookmarks(path, progress=None):
+    """Bookmarks from a Chromium "Bookmarks" JSON file.
+
+    Url nodes are small objects without arrays, while folders and the roots
+    contain "children" arrays. Only objects that have not (yet) turned out to
+    contain an array are kept in the buffer; each one that closes is decoded on
+    its own, so memory stays proportional to the largest single node.
+    """
+    buffer = ""
+    pos = 0
+    stack = []  # [start offset in buffer, contains an array]
+    for chunk in read_chunks(path, progress):
+        buffer += chunk
+        while True:
+            match = JSON_TOKEN.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            token = match.group()
+            if token == '"':
+                # Unterminated string: wait for the rest of it
+                pos = match.start()
+                break
+            pos = match.end()
+            if token == "{":
+                stack.append([match.start(), False])
+            elif token == "[":
+                for frame in stack:
+                    frame[1] = True
+            elif token == "}" and stack:
+                start, is_container = stack.pop()
+                if is_container:
+                    continue
+                try:
+                    node = json.loads(buffer[start:match.end()])
+                except ValueError:
+                    continue
+                if node.get("type") == "url" and is_importable(node.get("url", "")):
+                    yield {"url": node["url"], "title": node.get("name") or node["url"]}
+        # Drop everything no open leaf object still needs
+        keep_from = min((frame[0] for frame in stack if not frame[1]), default=pos)
+        if keep_from:
+            buffer = buffer[keep_from:]
+            pos -= keep_from
+            for frame in stack:
+                frame[0] -= keep_from
+
+
+def iter_bookmark_file(path, progress=None):
+    """Pick the reader from the file name: .html/.htm is Netscape, anything else Chromium JSON"""
+    if path.lower().endswith((".html", ".htm")):
+        return iter_netscape_bookmarks(path, progress)
+    return iter_chrome_bookmarks(path, progress)
+
+
+def write_netscape_bookmarks(path, bookmarks):
+    now = int(time.time())
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE NETSCAPE-Bookmark-file-1>\n"
+                '<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">\n'
+                "<TITLE>Bookmarks</TITLE>\n<H1>Bookmarks</H1>\n<DL><p>\n")
+        for bm in bookmarks:
+            f.write(f'    <DT><A HREF="{html.escape(bm["url"], quote=True)}" ADD_DATE="{now}">'
+                    f'{html.escape(bm["title"], quote=False)}</A>\n')
+        f.write("</DL><p>\n")
+
+
+def write_chrome_bookmarks(path, bookmarks):
+    # Chromium stores times as microseconds since 1601-01-01
+    date_added = str(int((time.time() + CHROME_EPOCH_OFFSET) * 1000000))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{\n   "roots": {\n      "bookmark_bar": {\n         "children": [')
+        for i, bm in enumerate(bookmarks):
+            node = {"date_added": date_added, "id": str(i + 4), "name": bm["title"],
+                    "type": "url", "url": bm["url"]}
+            f.write(("," if i else "") + "\n            " + json.dumps(node, ensure_ascii=False))
+        f.write('\n         ],\n         "date_added": "%s",\n         "id": "1",\n'
+                '         "name": "Bookmarks bar",\n         "type": "folder"\n      },\n'
+                '      "other": {"children": [], "date_added": "%s", "id": "2", "name": "Other bookmarks", "type": "folder"},\n'
+                '      "synced": {"children": [], "date_added": "%s", "id": "3", "name": "Mobile bookmarks", "type": "folder"}\n'
+                '   },\n   "version": 1\n}\n' % (date_added, date_added, date_added))
+
+
+def write_bookmark_file(path, bookmarks):
+    """Export in the format matching the file name, like iter_bookmark_file"""
+    if path.lower().endswith((".html", ".htm")):
+        write_netscape_bookmarks(path, bookmarks)
+    else:
+        write_chrome_bookmarks(path, bookmarks)
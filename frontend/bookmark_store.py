@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+import urllib.parse
+from functools import lru_cache
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+@lru_cache(maxsize=4096)
+def normalize_url(url):
+    """Key under which equivalent URLs collide: case-folded scheme/host, no default port or trailing slash"""
+    try:
+        parts = urllib.parse.urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    netloc = host
+    if parts.username or parts.password:
+        # Keep user info verbatim; only the host part is case-insensitive
+        netloc = parts.netloc.rsplit("@", 1)[0] + "@" + host
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        netloc += f":{port}"
+    path = parts.path.rstrip("/") or "/"
+    return urllib.parse.urlunsplit((scheme, netloc, path, parts.query, parts.fragment))
+
+
+class BookmarkCollection:
+    """Bookmarks in display order with constant-time lookup by normalized URL"""
+
+    def __init__(self, bookmarks=()):
+        # dicts keep insertion order, so the index doubles as the rendering order
+        self.by_url = {}
+        for bm in bookmarks:
+            self.add(bm)
+
+    def __len__(self):
+        return len(self.by_url)
+
+    def __iter__(self):
+        return iter(self.by_url.values())
+
+    def __contains__(self, url):
+        return normalize_url(url) in self.by_url
+
+    def get(self, url):
+        return self.by_url.get(normalize_url(url))
+
+    def add(self, bookmark):
+        """Append a bookmark; returns False if an equivalent URL is already bookmarked"""
+        key = normalize_url(bookmark["url"])
+        if key in self.by_url:
+            return False
+        self.by_url[key] = bookmark
+        return True
+
+    def remove(self, url):
+        """Remove and return the bookmark for a URL, or None"""
+        return self.by_url.pop(normalize_url(url), None)
+
+
+class BookmarkStore:
+    """bookmarks.json with debounced background saves, atomic replacement and rotating backups"""
+
+    def __init__(self, path, fallback_paths=(), delay=0.5, backups=3):
+        self.path = path
+        # Read-only files to seed from when the user has no bookmarks file yet
+        self.fallback_paths = list(fallback_paths)
+        self.delay = delay
+        self.backups = backups
+        self.lock = threading.Lock()
+        self.pending = None  # Latest unsaved snapshot; older ones are simply replaced
+        self.wakeup = threading.Event()
+        self.stopping = False
+        self.writer = threading.Thread(target=self.write_loop, name="bookmark-writer", daemon=True)
+        self.writer.start()
+
+    def backup_path(self, n):
+        return f"{self.path}.{n}"
+
+    def load(self):
+        """Bookmarks from the newest readable file, or None if there is none"""
+        candidates = [self.path] + [self.backup_path(n) for n in range(1, self.backups + 1)]
+        for path in candidates + self.fallback_paths:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    bookmarks = json.load(f)
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                # A damaged file falls through to the next backup instead of the defaults
+                print(f"Error loading bookmarks from {path}: {e}")
+                continue
+            if isinstance(bookmarks, list):
+                return bookmarks
+        return None
+
+    def save(self, bookmarks):
+        """Schedule a save; bursts of changes within the delay are written once"""
+        snapshot = [dict(bm) for bm in bookmarks]
+        with self.lock:
+            self.pending = snapshot
+        self.wakeup.set()
+
+    def write_loop(self):
+        while True:
+            self.wakeup.wait()
+            # Let further changes pile up before touching the disk
+            while not self.stopping:
+                self.wakeup.clear()
+                if not self.wakeup.wait(self.delay):
+                    break
+            self.wakeup.clear()
+            self.flush()
+            if self.stopping:
+                return
+
+    def flush(self):
+        with self.lock:
+            snapshot, self.pending = self.pending, None
+        if snapshot is None:
+            return
+        try:
+            self.write_atomic(snapshot)
+        except OSError as e:
+            print(f"Error saving bookmarks: {e}")
+
+    def write_atomic(self, bookmarks):
+        """Write to a temp file, fsync it, keep the old file as a backup and rename into place"""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(bookmarks, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        # bookmarks.json -> .1 -> .2 -> ... ; the oldest backup is dropped
+        for n in range(self.backups, 1, -1):
+            if os.path.exists(self.backup_path(n - 1)):
+                os.replace(self.backup_path(n - 1), self.backup_path(n))
+        if self.backups and os.path.exists(self.path):
+            os.replace(self.path, self.backup_path(1))
+        os.replace(temp_path, self.path)
+        if hasattr(os, "O_DIRECTORY"):
+            # Persist the renames themselves
+            fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def close(self):
+        """Write any pending change and stop the writer thread"""
+        self.stopping = True
+        self.wakeup.set()
+        self.writer.join()
+        self.flush()
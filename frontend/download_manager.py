@@ -0,0 +1,349 @@
+import json
+import os
+import shutil
+import time
+from collections import deque
+from functools import partial
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtWebEngineWidgets import QWebEngineDownloadItem
+
+QUEUED = 'Queued'
+IN_PROGRESS = 'In Progress'
+PAUSED = 'Paused'
+COMPLETED = 'Completed'
+FAILED = 'Failed'
+CANCELLED = 'Cancelled'
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+# Fields of a download dict written to the on-disk record
+RECORD_FIELDS = ('filename', 'path', 'url', 'mime_type', 'status', 'progress', 'received', 'total', 'finished_at')
+
+# Types of the optional record fields; values of another type are dropped on load
+OPTIONAL_FIELD_TYPES = {
+    'url': str, 'mime_type': str, 'progress': (int, float), 'received': (int, float),
+    'total': (int, float), 'finished_at': (int, float),
+}
+
+# Multi-part extensions kept together when numbering duplicate file names
+COMPOUND_EXTENSIONS = ('.tar.gz', '.tar.bz2', '.tar.xz')
+
+
+def unique_path(directory, filename, reserved=()):
+    """A path in directory that neither an existing file nor a running download uses.
+
+    Duplicates are numbered like browsers do: "report.pdf", "report (1).pdf", ...
+    """
+    filename = os.path.basename(filename.replace("\\", "/")).strip() or "download"
+    lower = filename.lower()
+    ext = next((e for e in COMPOUND_EXTENSIONS if lower.endswith(e)), None)
+    if ext is not None:
+        stem, ext = filename[:-len(ext)], filename[-len(ext):]
+    else:
+        stem, ext = os.path.splitext(filename)
+    candidate = os.path.join(directory, filename)
+    n = 1
+    while os.path.exists(candidate) or candidate in reserved:
+        candidate = os.path.join(directory, f"{stem} ({n}){ext}")
+        n += 1
+    return candidate
+
+
+class DownloadSettings:
+    """Download preferences in download_settings.json: the directory remembered per MIME
+    type and whether to show the inline location prompt"""
+
+    def __init__(self, path, default_directory):
+        self.path = path
+        self.default_directory = default_directory
+        self.ask_where = False
+        self.directories = {}  # "image/png" or "image/*" -> directory
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.ask_where = bool(data.get('ask_where', False))
+            self.directories = dict(data.get('directories', {}))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"Error loading download settings: {e}")
+
+    def directory_for(self, mime_type):
+        """The exact MIME type's directory, else its major type's, else the default"""
+        major = mime_type.split("/", 1)[0] + "/*"
+        return self.directories.get(mime_type) or self.directories.get(major) or self.default_directory
+
+    def remember(self, mime_type, directory):
+        if mime_type:
+            self.directories[mime_type] = directory
+            self.directories[mime_type.split("/", 1)[0] + "/*"] = directory
+        self.save()
+
+    def save(self):
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'ask_where': self.ask_where, 'directories': self.directories}, f, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Error saving download settings: {e}")
+
+
+def format_bytes(count):
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1024 or unit == "GB":
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+
+
+def format_eta(seconds):
+    if seconds < 60:
+        return f"{int(seconds)} s left"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min left"
+    return f"{seconds / 3600:.1f} h left"
+
+
+class DownloadManager(QObject):
+    """Schedules QWebEngineDownloadItems and keeps a record of finished downloads.
+
+    At most max_concurrent downloads transfer at once; the rest are accepted
+    but paused and resumed in request order as slots free up. Each download is
+    a dict (the same objects the download views display) carrying status,
+    progress, bytes/sec and ETA. Finished downloads are appended to a
+    JSON-lines file and reloaded on the next start; only the newest
+    max_history are kept.
+    """
+    added = pyqtSignal(object)
+    changed = pyqtSignal(object)
+    removed = pyqtSignal(object)
+    finished = pyqtSignal(object)
+
+    SAMPLE_INTERVAL = 0.5  # Seconds between throughput samples
+    SMOOTHING = 0.3  # Weight of the newest sample in the moving average
+
+    def __init__(self, record_path, max_concurrent=3, max_history=200, parent=None):
+        super().__init__(parent)
+        self.record_path = record_path
+        self.max_concurrent = max_concurrent
+        self.max_history = max_history
+        self.downloads = []  # Oldest first
+        self.items = {}  # id(download dict) -> QWebEngineDownloadItem, while it runs
+        self.queue = deque()  # Downloads waiting for a free slot
+        self.load_history()
+
+    # Record of finished downloads
+
+    def load_history(self):
+        try:
+            with open(self.record_path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            print(f"Error loading download history: {e}")
+            return
+        skipped = 0
+        for line in lines[-self.max_history:]:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None  # Torn last line from a crash mid-write
+            if not self.valid_record(record):
+                skipped += 1
+                continue
+            fields = {key: record[key] for key in RECORD_FIELDS if key in record}
+            for key, types in OPTIONAL_FIELD_TYPES.items():
+                if key in fields and not isinstance(fields[key], types):
+                    del fields[key]
+            self.downloads.append(self.new_download(**fields))
+        # Rewriting also terminates a torn line, which the next append would run into
+        if skipped or len(lines) > self.max_history:
+            self.rewrite_history()
+
+    def valid_record(self, record):
+        """Whether a parsed line describes a finished download that can be listed"""
+        return (isinstance(record, dict) and record.get('status') in FINISHED_STATES
+                and isinstance(record.get('filename'), str) and isinstance(record.get('path'), str))
+
+    def rewrite_history(self):
+        """Replace the record with the finished downloads still kept in memory"""
+        temp_path = self.record_path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for d in self.downloads:
+                    if d['status'] in FINISHED_STATES:
+                        f.write(self.record_line(d))
+            os.replace(temp_path, self.record_path)
+        except OSError as e:
+            print(f"Error saving download history: {e}")
+
+    def record_line(self, d):
+        return json.dumps({key: d.get(key) for key in RECORD_FIELDS}, ensure_ascii=False) + "\n"
+
+    def append_record(self, d):
+        try:
+            with open(self.record_path, 'a', encoding='utf-8') as f:
+                f.write(self.record_line(d))
+        except OSError as e:
+            print(f"Error saving download history: {e}")
+
+    # Scheduling
+
+    def new_download(self, filename, path, url="", mime_type="", status=QUEUED, progress=0,
+                     received=0, total=0, finished_at=None):
+        d = {
+            'filename': filename, 'path': path, 'url': url, 'mime_type': mime_type,
+            'status': status, 'progress': progress, 'received': received, 'total': total,
+            'finished_at': finished_at, 'speed': 0.0, 'eta': None,
+            'sample_time': time.monotonic(), 'sample_bytes': received,
+        }
+        d['cancel_callback'] = partial(self.cancel, d)
+        d['pause_callback'] = partial(self.toggle_pause, d)
+        return d
+
+    def reserved_paths(self):
+        """Target paths of downloads that haven't finished; their files may not exist yet"""
+        return {p for d in self.downloads if d['status'] not in FINISHED_STATES
+                for p in (d['path'], d.get('move_to')) if p}
+
+    def relocate(self, d, path):
+        """Save a download under another path: moved now if it's complete, otherwise once it is"""
+        if d['status'] == COMPLETED:
+            self.move_file(d, path)
+            self.changed.emit(d)
+        elif d['status'] not in FINISHED_STATES:
+            d['move_to'] = path
+
+    def move_file(self, d, path):
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            shutil.move(d['path'], path)
+        except OSError as e:
+            print(f"Error moving download to {path}: {e}")
+            return
+        d['path'] = path
+        d['filename'] = os.path.basename(path)
+
+    def active_count(self):
+        return sum(1 for d in self.downloads if d['status'] == IN_PROGRESS)
+
+    def can_pause(self, item):
+        # pause()/resume() need Qt 5.10
+        return hasattr(item, "pause")
+
+    def start(self, item, path):
+        """Accept a download into path; it transfers now or waits for a free slot"""
+        item.setPath(path)
+        item.accept()
+        d = self.new_download(os.path.basename(path), path, item.url().toString(), item.mimeType())
+        self.items[id(d)] = item
+        item.downloadProgress.connect(partial(self.on_progress, d))
+        item.finished.connect(partial(self.on_finished, d))
+        if self.active_count() >= self.max_concurrent and self.can_pause(item):
+            item.pause()
+            self.queue.append(d)
+        else:
+            d['status'] = IN_PROGRESS
+        self.downloads.append(d)
+        self.added.emit(d)
+        return d
+
+    def start_queued(self):
+        """Resume queued downloads while there are free slots"""
+        while self.queue and self.active_count() < self.max_concurrent:
+            d = self.queue.popleft()
+            item = self.items.get(id(d))
+            if item is None or d['status'] != QUEUED:
+                continue
+            item.resume()
+            d['status'] = IN_PROGRESS
+            d['sample_time'], d['sample_bytes'] = time.monotonic(), d['received']
+            self.changed.emit(d)
+
+    def toggle_pause(self, d):
+        if d['status'] in (PAUSED, QUEUED):
+            self.resume(d)
+        else:
+            self.pause(d)
+
+    def pause(self, d):
+        item = self.items.get(id(d))
+        if item is None or d['status'] != IN_PROGRESS or not self.can_pause(item):
+            return
+        item.pause()
+        d['status'] = PAUSED
+        d['speed'], d['eta'] = 0.0, None
+        self.changed.emit(d)
+        self.start_queued()
+
+    def resume(self, d):
+        """Resume a paused download, or move a queued one to the front of the queue"""
+        if id(d) not in self.items or d['status'] not in (PAUSED, QUEUED):
+            return
+        if d in self.queue:
+            self.queue.remove(d)
+        d['status'] = QUEUED
+        self.queue.appendleft(d)
+        self.start_queued()
+        self.changed.emit(d)
+
+    def cancel(self, d):
+        item = self.items.get(id(d))
+        if item is not None:
+            # finished() follows and records the cancellation
+            item.cancel()
+
+    # Progress
+
+    def on_progress(self, d, received, total):
+        d['received'] = received
+        d['total'] = total
+        now = time.monotonic()
+        elapsed = now - d['sample_time']
+        sampled = elapsed >= self.SAMPLE_INTERVAL
+        if sampled:
+            rate = (received - d['sample_bytes']) / elapsed
+            # Exponential moving average over the received/total samples
+            d['speed'] = rate if not d['speed'] else (1 - self.SMOOTHING) * d['speed'] + self.SMOOTHING * rate
+            d['sample_time'], d['sample_bytes'] = now, received
+            d['eta'] = (total - received) / d['speed'] if total > 0 and d['speed'] > 0 else None
+        percent = int(received * 100 / total) if total > 0 else 0
+        # Most ticks change neither the percentage nor the speed; those emit nothing
+        if percent != d['progress'] or sampled:
+            d['progress'] = percent
+            self.changed.emit(d)
+
+    def on_finished(self, d):
+        item = self.items.pop(id(d), None)
+        if item is None:
+            return
+        state = item.state()
+        if state == QWebEngineDownloadItem.DownloadCompleted:
+            d['status'] = COMPLETED
+            d['progress'] = 100
+        elif state == QWebEngineDownloadItem.DownloadCancelled:
+            d['status'] = CANCELLED
+        else:
+            d['status'] = FAILED
+        d['speed'], d['eta'] = 0.0, None
+        d['finished_at'] = time.time()
+        if d in self.queue:
+            self.queue.remove(d)
+        if d['status'] == COMPLETED and d.get('move_to'):
+            self.move_file(d, d.pop('move_to'))
+        self.append_record(d)
+        self.changed.emit(d)
+        self.finished.emit(d)
+        self.prune()
+        self.start_queued()
+
+    def prune(self):
+        """Forget the oldest finished downloads beyond max_history, on disk too"""
+        finished = [d for d in self.downloads if d['status'] in FINISHED_STATES]
+        excess = finished[:max(0, len(finished) - self.max_history)]
+        for d in excess:
+            self.downloads.remove(d)
+            self.removed.emit(d)
+        if excess:
+            self.rewrite_history()
@@ -0,0 +1,101 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class FaviconCache:
+    """PNG favicons, one file per domain, evicting the least recently used past max_bytes.
+
+    The whole cache is small, so every icon is also held in memory and served
+    from there; the disk is only touched when an icon is stored or evicted.
+    Recency survives restarts through the files' modification times, which
+    save_recency() writes in least recently used order.
+    """
+
+    def __init__(self, directory, max_bytes=4 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # file name -> PNG bytes, least recently used first
+        self.total_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self.scan()
+
+    def scan(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".png"):
+                continue
+            try:
+                mtime = os.stat(os.path.join(self.directory, name)).st_mtime
+            except OSError:
+                continue
+            files.append((mtime, name))
+        for _, name in sorted(files):
+            try:
+                with open(os.path.join(self.directory, name), "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            self.entries[name] = data
+            self.total_bytes += len(data)
+
+    def file_name(self, domain):
+        # Hashed so ports, IDNs and odd characters never reach the file system
+        return hashlib.sha1(domain.encode("utf-8")).hexdigest() + ".png"
+
+    def __contains__(self, domain):
+        return self.file_name(domain) in self.entries
+
+    def get(self, domain):
+        """PNG bytes for a domain, or None if it isn't cached"""
+        name = self.file_name(domain)
+        with self.lock:
+            data = self.entries.get(name)
+            if data is not None:
+                self.entries.move_to_end(name)
+            return data
+
+    def put(self, domain, data):
+        """Store a domain's icon, replacing any older one, then evict down to max_bytes"""
+        name = self.file_name(domain)
+        with self.lock:
+            if self.entries.get(name) == data:
+                self.entries.move_to_end(name)
+                return
+        path = os.path.join(self.directory, name)
+        temp_path = path + ".tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Error caching favicon for {domain}: {e}")
+            return
+        with self.lock:
+            old = self.entries.pop(name, None)
+            self.total_bytes += len(data) - (len(old) if old is not None else 0)
+            self.entries[name] = data
+            evicted = []
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                old_name, old_data = self.entries.popitem(last=False)
+                self.total_bytes -= len(old_data)
+                evicted.append(old_name)
+        for old_name in evicted:
+            try:
+                os.remove(os.path.join(self.directory, old_name))
+            except OSError:
+                pass
+
+    def save_recency(self):
+        """Stamp the files' modification times in use order, for the next scan()"""
+        with self.lock:
+            names = list(self.entries)
+        start = time.time() - len(names)
+        for i, name in enumerate(names):
+            try:
+                os.utime(os.path.join(self.directory, name), (start + i, start + i))
+            except OSError:
+                pass
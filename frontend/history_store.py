@@ -0,0 +1,192 @@
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+
+class HistoryStore:
+    """Browsing history persisted in SQLite (WAL mode), written in batches on a background thread"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS visits (
+            id INTEGER PRIMARY KEY,
+            url TEXT NOT NULL,
+            title TEXT NOT NULL,
+            visit_time REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS visits_url ON visits(url);
+        CREATE INDEX IF NOT EXISTS visits_time ON visits(visit_time);
+        CREATE INDEX IF NOT EXISTS visits_title ON visits(title);
+    """
+
+    # External-content FTS5 index over titles and URLs, kept in sync by triggers
+    FTS_SCHEMA = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS visits_fts USING fts5(
+            title, url, content='visits', content_rowid='id'
+        );
+        CREATE TRIGGER IF NOT EXISTS visits_fts_insert AFTER INSERT ON visits BEGIN
+            INSERT INTO visits_fts(rowid, title, url) VALUES (new.id, new.title, new.url);
+        END;
+        CREATE TRIGGER IF NOT EXISTS visits_fts_delete AFTER DELETE ON visits BEGIN
+            INSERT INTO visits_fts(visits_fts, rowid, title, url) VALUES ('delete', old.id, old.title, old.url);
+        END;
+        CREATE TRIGGER IF NOT EXISTS visits_fts_update AFTER UPDATE ON visits BEGIN
+            INSERT INTO visits_fts(visits_fts, rowid, title, url) VALUES ('delete', old.id, old.title, old.url);
+            INSERT INTO visits_fts(rowid, title, url) VALUES (new.id, new.title, new.url);
+        END;
+    """
+
+    TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+    # Queue markers understood by the writer thread
+    FLUSH = "flush"
+    STOP = "stop"
+
+    def __init__(self, path, batch_interval=1.0, retention_days=365):
+        self.path = path
+        self.batch_interval = batch_interval
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Reads happen on the GUI thread through their own connection; WAL lets them
+        # run concurrently with the writer thread's transactions
+        self.conn = self.connect()
+        self.local = threading.local()
+        self.local.conn = self.conn
+        self.conn.executescript(self.SCHEMA)
+        self.has_fts = self.create_fts_index()
+        self.conn.commit()
+        self.queue = queue.Queue()
+        self.writer = threading.Thread(target=self.write_loop, name="history-writer", daemon=True)
+        self.writer.start()
+        if retention_days:
+            cutoff = time.time() - retention_days * 86400
+            self.queue.put(("DELETE FROM visits WHERE visit_time < ?", (cutoff,)))
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only syncs at checkpoints, so commits don't wait on fsync
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def create_fts_index(self):
+        """Set up the full-text index; returns False if SQLite was built without FTS5"""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'visits_fts'").fetchone() is not None
+        try:
+            self.conn.executescript(self.FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            return False
+        if not exists:
+            # Index visits recorded before the index existed
+            self.conn.execute("INSERT INTO visits_fts(visits_fts) VALUES ('rebuild')")
+        return True
+
+    def reader(self):
+        """Read connection for the calling thread, so searches can run off the GUI thread"""
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = self.connect()
+        return conn
+
+    def write_loop(self):
+        """Writer thread: group queued statements into one transaction per batch"""
+        conn = self.connect()
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.batch_interval
+            # Keep collecting until the batch window closes or someone asks for a flush
+            while batch[-1] not in (self.FLUSH, self.STOP):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            statements = [item for item in batch if item not in (self.FLUSH, self.STOP)]
+            try:
+                with conn:
+                    for sql, params in statements:
+                        conn.execute(sql, params)
+            except sqlite3.Error as e:
+                print(f"Error writing history: {e}")
+            running = self.STOP not in batch
+            for _ in batch:
+                self.queue.task_done()
+        conn.close()
+
+    def add_visit(self, url, title, timestamp=None):
+        """Record a visit; returns immediately, the write happens on the writer thread"""
+        visit_time = (timestamp or datetime.now()).timestamp()
+        self.queue.put(("INSERT INTO visits (url, title, visit_time) VALUES (?, ?, ?)",
+                        (url, title or url, visit_time)))
+
+    def update_title(self, url, title):
+        """Set the title of the latest visit to a URL once the page has reported it"""
+        self.queue.put(("UPDATE visits SET title = ? WHERE id = (SELECT MAX(id) FROM visits WHERE url = ?)",
+                        (title, url)))
+
+    def delete_url(self, url):
+        """Remove every visit to a URL"""
+        self.queue.put(("DELETE FROM visits WHERE url = ?", (url,)))
+        self.flush()
+
+    def clear(self):
+        """Remove all history"""
+        self.queue.put(("DELETE FROM visits", ()))
+        self.flush()
+
+    def flush(self):
+        """Block until every queued write has been committed"""
+        self.queue.put(self.FLUSH)
+        self.queue.join()
+
+    def close(self):
+        """Commit pending writes and stop the writer thread"""
+        if self.writer.is_alive():
+            self.queue.put(self.STOP)
+            self.writer.join()
+        self.conn.close()
+
+    def row_to_entry(self, row):
+        return {
+            'url': row[0],
+            'title': row[1],
+            'timestamp': datetime.fromtimestamp(row[2]),
+        }
+
+    def recent(self, limit=1000, offset=0):
+        """Most recent visits first, as dicts with url, title and timestamp"""
+        rows = self.reader().execute(
+            "SELECT url, title, visit_time FROM visits ORDER BY visit_time DESC LIMIT ? OFFSET ?",
+            (limit, offset)).fetchall()
+        return [self.row_to_entry(row) for row in rows]
+
+    def search(self, text, limit=50, offset=0):
+        """Ranked page of visits whose title or URL contains words starting with the query words"""
+        tokens = self.TOKEN_PATTERN.findall(text.lower())
+        if not tokens:
+            return self.recent(limit, offset)
+        if self.has_fts:
+            # Every query word is matched as a prefix: "you tub" finds "YouTube - Tubes"
+            match = " ".join(f'"{token}"*' for token in tokens)
+            rows = self.reader().execute(
+                "SELECT v.url, v.title, v.visit_time FROM visits_fts"
+                " JOIN visits v ON v.id = visits_fts.rowid"
+                " WHERE visits_fts MATCH ?"
+                " ORDER BY bm25(visits_fts, 2.0, 1.0), v.visit_time DESC LIMIT ? OFFSET ?",
+                (match, limit, offset)).fetchall()
+        else:
+            where = " AND ".join("(title LIKE ? OR url LIKE ?)" for _ in tokens)
+            params = []
+            for token in tokens:
+                params += [f"%{token}%", f"%{token}%"]
+            rows = self.reader().execute(
+                f"SELECT url, title, visit_time FROM visits WHERE {where}"
+                " ORDER BY visit_time DESC LIMIT ? OFFSET ?",
+                (*params, limit, offset)).fetchall()
+        return [self.row_to_entry(row) for row in rows]
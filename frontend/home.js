@@ -10,6 +10,47 @@ function setTheme(isDark) {
     document.body.className = isDark ? 'dark' : '';
 }
 
+// Bookmark grid patching
+function addBookmark(tileHtml) {
+    const grid = document.getElementById('bookmarks-grid');
+    if (grid) {
+        grid.insertAdjacentHTML('beforeend', tileHtml);
+    }
+}
+
+function removeBookmark(url) {
+    document.querySelectorAll('.bookmark-container').forEach(function (tile) {
+        if (tile.dataset.url === url) {
+            tile.remove();
+        }
+    });
+}
+
+function setBookmarks(gridHtml) {
+    const grid = document.getElementById('bookmarks-grid');
+    if (grid) {
+        grid.innerHTML = gridHtml;
+    }
+}
+
+// Tiles only carry their URL in data-url; one delegated handler opens them, and only
+// for web schemes, so a bookmarked javascript: URL can't run in this page
+const NAVIGABLE_SCHEMES = ['http:', 'https:', 'ftp:', 'file:', 'adapta:'];
+
+function openBookmark(event) {
+    const tile = event.target.closest('.bookmark-container');
+    if (!tile || !tile.closest('#bookmarks-grid')) {
+        return;
+    }
+    const url = tile.dataset.url || '';
+    const scheme = url.slice(0, url.indexOf(':') + 1).toLowerCase();
+    if (NAVIGABLE_SCHEMES.includes(scheme)) {
+        window.location.href = url;
+    }
+}
+
+document.addEventListener('click', openBookmark);
+
 // Initialization
 function initialize() {
     // Focus search box
@@ -25,5 +66,8 @@ window.addEventListener('load', initialize);
 // Expose functions globally for Python integration
 window.AdaptaHome = {
     handleSearch,
-    setTheme
+    setTheme,
+    addBookmark,
+    removeBookmark,
+    setBookmarks
 };
@@ -2,51 +2,880 @@ import sys
 import os
 import re
 import json
+import html
 import gc
-from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QLineEdit, QTabWidget, QLabel, QDialog, QListWidget, QProgressBar, QListWidgetItem, QFrame
-from PyQt5.QtWebEngineWidgets import QWebEngineView
-from PyQt5.QtCore import QUrl, Qt, QSize
-from PyQt5.QtGui import QFont, QIcon, QPixmap, QPainter
+import time
+import itertools
+import urllib.parse
+from collections import deque
+from datetime import datetime, timedelta
+from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QLineEdit, QTabWidget, QLabel, QDialog, QFrame, QListView, QStyledItemDelegate, QStyleOptionProgressBar, QStyle
+from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEngineProfile
+from PyQt5.QtWebEngineCore import QWebEngineUrlScheme, QWebEngineUrlSchemeHandler, QWebEngineUrlRequestJob
+from PyQt5.QtCore import QUrl, Qt, QSize, QTimer, QBuffer, QIODevice, QStandardPaths, QObject, pyqtSignal, QAbstractItemModel, QAbstractListModel, QModelIndex, QRect, QEvent
+from PyQt5.QtGui import QFont, QIcon, QPixmap, QPainter, QPalette, QColor
 from PyQt5.QtSvg import QSvgRenderer
-from functools import partial
-import speech_recognition as sr
-from PyQt5.QtWidgets import QMessageBox
+from functools import partial, lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from history_store import HistoryStore
+from navigation import NavigationEntry, NavigationHistory, favicons, url_domain
+from session_store import SessionJournal
+from bookmark_store import BookmarkStore, BookmarkCollection
+from favicon_cache import FaviconCache
+from download_manager import DownloadManager, DownloadSettings, unique_path, QUEUED, IN_PROGRESS, PAUSED, COMPLETED, CANCELLED, format_bytes, format_eta
+from voice import VoiceCommandWorker, WakeWordListener, RecognizerWarmup, create_recognizer_backend
+from voice_commands import VOICE_COMMANDS, SITE_SHORTCUTS
+
+HOME_URL = "adapta://home/"
+
+def is_home_url(url):
+    """Whether a URL string points at the built-in home page"""
+    return url.startswith("adapta://home")
+
+def env_int(name, default=None):
+    """A positive integer from the environment variable name, else default"""
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number <= 0:
+        print(f"Error reading {name}: expected a positive integer, got '{value}'")
+        return default
+    return number
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{(\w+)\}\}")
+
+class HomeTemplate:
+    """home.html pre-split at its {{...}} placeholders, reloaded only when the file changes"""
+    def __init__(self, path):
+        self.path = path
+        self.mtime = None
+        # Alternating literal text and placeholder names: [text, name, text, name, text]
+        self.parts = []
+
+    def render(self, values):
+        """Fill in placeholders; raises FileNotFoundError if the template is missing"""
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime != self.mtime:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.parts = PLACEHOLDER_PATTERN.split(f.read())
+            self.mtime = mtime
+        return "".join(
+            values.get(part, "{{" + part + "}}") if i % 2 else part
+            for i, part in enumerate(self.parts)
+        )
+
+# Schemes a bookmark tile may navigate to; anything else (javascript:, data:, ...) is inert
+NAVIGABLE_SCHEMES = ("http:", "https:", "ftp:", "file:", "adapta:")
+
+@lru_cache(maxsize=4096)
+def render_bookmark_tile(url, title, fallback=False):
+    """HTML for one bookmark tile, memoized so unchanged tiles are never re-rendered"""
+    # Favicons come from the local cache through adapta://favicon, so tiles need no network
+    favicon_url = f"adapta://favicon/{urllib.parse.quote(url_domain(url), safe='')}"
+    # Get first letter for fallback
+    first_letter = html.escape(title[0].upper() if title else "?")
+    name = html.escape(title[:15] + ("..." if len(title) > 15 else ""))
+    # Bookmarks can come from imported files, so nothing here is trusted: the URL is
+    # escaped so the browser decodes dataset.url back to exactly this URL
+    url_attr = html.escape(url, quote=True)
+    if fallback:
+        # The fallback page has no home.js; the URL goes in as an escaped JS string literal
+        onclick = ""
+        if url.lower().startswith(NAVIGABLE_SCHEMES):
+            onclick = f' onclick="window.location.href={html.escape(json.dumps(url), quote=True)}"'
+
+        return f'''
+                <div data-url="{url_attr}" style="display: flex; flex-direction: column; align-items: center; margin: 0 10px;">
+                    <div style="width: 100px; height: 100px; border: 1px solid rgba(255,255,255,0.2); border-radius: 20px; padding: 10px; text-align: center; cursor: pointer; background: rgba(45,45,45,0.7); backdrop-filter: blur(10px); display: flex; flex-direction: column; justify-content: center; align-items: center; transition: all 0.3s ease; box-shadow: 0 4px 20px rgba(0,0,0,0.1); margin-bottom: 8px;"{onclick}>
+                        <div style="width: 50px; height: 50px; border-radius: 12px; background-image: url('{favicon_url}'); background-size: cover; background-position: center; background-color: #fff; display: flex; align-items: center; justify-content: center; font-size: 24px; font-weight: bold; color: #333;">
+                            <span style="display: none;">{first_letter}</span>
+                        </div>
+                    </div>
+                    <div style="font-size: 0.85rem; font-weight: 500; text-align: center; max-width: 100px; line-height: 1.2; color: inherit;">{name}</div>
+                </div>'''
+    return f'''
+                <div class="bookmark-container" data-url="{url_attr}">
+                    <div class="bookmark-item">
+                        <div class="bookmark-logo" style="background-image: url('{favicon_url}'); background-size: cover; background-position: center;">
+                            <span style="display: none;">{first_letter}</span>
+                        </div>
+                    </div>
+                    <div class="bookmark-name">{name}</div>
+                </div>'''
+
+def register_adapta_scheme():
+    """Register the adapta:// scheme; must run before the QApplication is created"""
+    scheme = QWebEngineUrlScheme(b"adapta")
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    scheme.setFlags(QWebEngineUrlScheme.SecureScheme)
+    QWebEngineUrlScheme.registerScheme(scheme)
 
 class BrowserTab(QWidget):
-    def __init__(self, parent=None, is_dark_mode=False):
+    # Emitted after the tab has recorded a navigation (tab, url)
+    navigated = pyqtSignal(object, str)
+    # A new history entry was recorded (url, title, timestamp)
+    visited = pyqtSignal(str, str, object)
+    # The page reported the real title of the current entry (url, title)
+    title_recorded = pyqtSignal(str, str)
+    # Title or favicon changed and the tab bar needs repainting (tab)
+    appearance_changed = pyqtSignal(object)
+    # The mirror followed a back/forward step taken inside Chromium (tab)
+    history_stepped = pyqtSignal(object)
+    # The current entry's URL was rewritten in place, e.g. by history.replaceState() (tab, url)
+    url_replaced = pyqtSignal(object, str)
+    # The page's favicon was loaded (domain, icon)
+    favicon_loaded = pyqtSignal(str, object)
+
+    def __init__(self, parent=None, is_dark_mode=False, url=None, title=None, favicon=None):
         super().__init__(parent)
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(0, 0, 0, 0)
         self.layout.setSpacing(0)
-        self.browser = QWebEngineView()
-        self.browser.setMinimumSize(400, 300)
-        self.layout.addWidget(self.browser)
-        self.history = []  # Will store dicts with url, title, timestamp, favicon
-        self.current_index = -1
+        # The web view is created lazily by materialize() the first time the tab is shown
+        self.browser = None
+        # Lightweight metadata kept for placeholder tabs (url=None means the home page)
+        self.url = url
+        self.title = title or "New Tab"
+        self.favicon = favicon if favicon is not None else QIcon()
+        self.history = NavigationHistory()  # Bounded back/forward entries for this tab
         self.is_dark_mode = is_dark_mode
+        # Bookkeeping for the LRU tab discarder
+        self.last_active = time.monotonic()
+        self.scroll_position = None  # (x, y) saved when the web view is discarded
+        # Number of signal handlers connected to the current web view; wiring happens once
+        # per view, so this must not grow with navigations
+        self.handler_count = 0
+        # Chromium's history position at the last URL change, used to tell traversals
+        # and same-document URL replacements from new visits
+        self.native_index = -1
+        self.native_count = 0
+
+    def bind(self, signal, slot):
+        """Connect a web view signal to a handler, counting the connection"""
+        signal.connect(slot)
+        self.handler_count += 1
+
+    def is_materialized(self):
+        """Whether the tab currently owns a QWebEngineView"""
+        return self.browser is not None
+
+    def materialize(self):
+        """Create the QWebEngineView for this tab if it doesn't exist yet"""
+        if self.browser is None:
+            self.browser = QWebEngineView()
+            self.browser.setMinimumSize(400, 300)
+            self.native_index = -1
+            self.native_count = 0
+            self.layout.addWidget(self.browser)
+            # The tab handles its own view's events, whether or not it is the current tab
+            self.bind(self.browser.urlChanged, self.on_url_changed)
+            self.bind(self.browser.iconChanged, self.on_icon_changed)
+            self.bind(self.browser.titleChanged, self.on_title_changed)
+        return self.browser
+
+    def on_url_changed(self, qurl):
+        """Record a navigation in the tab's metadata and back/forward history"""
+        url = qurl.toString()
+        self.url = None if is_home_url(url) else url
+        self.title = self.browser.title() or "New Tab"
+        # Only shown on the tab: until iconChanged fires this can still be the previous page's icon
+        self.favicon = self.browser.icon()
+        self.appearance_changed.emit(self)
+        web_history = self.browser.history()
+        index, count = web_history.currentItemIndex(), web_history.count()
+        moved = index - self.native_index
+        replaced = moved == 0 and count == self.native_count
+        self.native_index, self.native_count = index, count
+        # Check if this URL is already the current history entry
+        current_entry = self.history.current()
+        if current_entry is None or current_entry.url != url:
+            if not self.reconcile_history(url, moved, replaced):
+                entry = NavigationEntry(url, self.browser.title() or url)
+                # Adds the entry after the current one, dropping forward history in place
+                self.history.visit(entry)
+                self.visited.emit(url, entry.title, entry.timestamp)
+        self.navigated.emit(self, url)
+
+    def reconcile_history(self, url, moved, replaced):
+        """Follow a Chromium-side traversal or URL replacement in the mirror; False for a new visit"""
+        mirror = self.history
+        if moved == -1 and mirror.can_go_back() and mirror.entries[mirror.index - 1].url == url:
+            mirror.back()
+            self.history_stepped.emit(self)
+        elif moved == 1 and mirror.can_go_forward() and mirror.entries[mirror.index + 1].url == url:
+            mirror.forward()
+            self.history_stepped.emit(self)
+        elif replaced and mirror.current() is not None:
+            # history.replaceState() and similar rewrite the current entry in place
+            entry = mirror.current()
+            entry.url = url
+            entry.domain = url_domain(url)
+            self.url_replaced.emit(self, url)
+        else:
+            return False
+        return True
+
+    def on_icon_changed(self, icon):
+        """Remember the tab's favicon, also for its domain"""
+        self.favicon = icon
+        if not icon.isNull():
+            # History entries look their favicon up by domain
+            domain = url_domain(self.browser.url().toString())
+            favicons.set(domain, icon)
+            self.favicon_loaded.emit(domain, icon)
+        self.appearance_changed.emit(self)
+
+    def on_title_changed(self, title):
+        """Remember the title, also on the current history entry"""
+        self.title = title or "New Tab"
+        url = self.browser.url().toString()
+        entry = self.history.current()
+        if title and entry is not None and entry.url == url and entry.title != title:
+            entry.title = title
+            self.title_recorded.emit(url, title)
+        self.appearance_changed.emit(self)
+
+    def discard(self):
+        """Tear down the web view, keeping url, title, favicon, history and scroll position"""
+        if self.browser is None:
+            return
+        url = self.browser.url().toString()
+        self.url = None if is_home_url(url) else url
+        self.title = self.browser.title() or self.title
+        self.favicon = self.browser.icon()
+        position = self.browser.page().scrollPosition()
+        self.scroll_position = (position.x(), position.y())
+        # Silence the view so no late signals reach handlers that expect a live browser
+        self.browser.blockSignals(True)
+        self.layout.removeWidget(self.browser)
+        self.browser.deleteLater()
+        self.browser = None
+        self.handler_count = 0
+
+    def current_url(self):
+        """URL of the page shown in the tab, or the pending URL of a placeholder"""
+        if self.browser is not None:
+            return self.browser.url().toString()
+        return self.url or ""
+
+    def current_title(self):
+        """Title of the page shown in the tab, or the remembered title of a placeholder"""
+        if self.browser is not None:
+            return self.browser.title() or self.title
+        return self.title
+
+class AdaptaSchemeHandler(QWebEngineUrlSchemeHandler):
+    """Serve adapta://home and its static assets from memory, and adapta://favicon from the favicon cache"""
+    STATIC_ASSETS = {
+        "home.css": b"text/css",
+        "home.js": b"application/javascript",
+    }
+
+    # Letter tile for domains without a cached favicon yet
+    PLACEHOLDER_ICON = (
+        '<svg xmlns="http://www.w3.org/2000/svg" width="64" height="64">'
+        '<rect width="64" height="64" rx="12" fill="#e8eaed"/>'
+        '<text x="32" y="43" font-family="sans-serif" font-size="30" font-weight="bold" '
+        'text-anchor="middle" fill="#5f6368">{letter}</text></svg>')
+
+    def __init__(self, render_home, render_fallback, favicon_cache, parent=None):
+        super().__init__(parent)
+        self.render_home = render_home
+        self.render_fallback = render_fallback
+        self.favicon_cache = favicon_cache
+        self.assets = {}  # Static file contents, read from disk once
+
+    def asset(self, name):
+        if name not in self.assets:
+            try:
+                with open(os.path.join(os.path.dirname(__file__), name), "rb") as f:
+                    self.assets[name] = f.read()
+            except OSError:
+                self.assets[name] = None
+        return self.assets[name]
+
+    def favicon(self, domain):
+        """Cached PNG for a domain, or a generated letter tile"""
+        data = self.favicon_cache.get(domain)
+        if data is not None:
+            return data, b"image/png"
+        name = domain.split("@")[-1]
+        if name.startswith("www."):
+            name = name[4:]
+        letter = name[:1].upper() if name[:1].isalnum() else "?"
+        return self.PLACEHOLDER_ICON.format(letter=letter).encode("utf-8"), b"image/svg+xml"
+
+    def requestStarted(self, job):
+        url = job.requestUrl()
+        path = url.path().lstrip("/")
+        if url.host() == "favicon":
+            data, mime_type = self.favicon(urllib.parse.unquote(url.path(QUrl.FullyEncoded).lstrip("/")))
+            self.reply(job, mime_type, data)
+            return
+        if url.host() != "home":
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+            return
+        if path in ("", "index.html"):
+            try:
+                page = self.render_home()
+            except Exception as e:
+                print(f"Error creating home page: {e}")
+                page = self.render_fallback()
+            data = page.encode("utf-8")
+            mime_type = b"text/html"
+        elif path in self.STATIC_ASSETS:
+            data = self.asset(path)
+            mime_type = self.STATIC_ASSETS[path]
+            if data is None:
+                job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+                return
+        else:
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+            return
+        self.reply(job, mime_type, data)
+
+    def reply(self, job, mime_type, data):
+        # The buffer is parented to the job so it lives exactly as long as the reply
+        buffer = QBuffer(job)
+        buffer.setData(data)
+        buffer.open(QIODevice.ReadOnly)
+        job.reply(mime_type, buffer)
+
+class HistorySearch(QObject):
+    """Run history searches on a worker thread; results arrive through results_ready"""
+    results_ready = pyqtSignal(int, int, list)  # generation, offset, entries
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.generation = 0  # Bumped for every new query so stale results can be dropped
+
+    def search(self, text, offset=0, limit=50):
+        if offset == 0:
+            self.generation += 1
+        generation = self.generation
+
+        def run():
+            # Skip queries that were superseded while waiting in the queue
+            if generation != self.generation:
+                return
+            try:
+                entries = self.store.search(text, limit=limit, offset=offset)
+            except Exception as e:
+                print(f"Error searching history: {e}")
+                entries = []
+            self.results_ready.emit(generation, offset, entries)
+        self.executor.submit(run)
+        return generation
+
+class BookmarkTransfer(QObject):
+    """Import and export bookmark files on a worker thread, reporting progress through signals"""
+    progress = pyqtSignal(int)  # percent
+    batch_ready = pyqtSignal(list)  # imported bookmarks, in file order
+    finished = pyqtSignal(str, int, str)  # "import"/"export", bookmark count, error message
+
+    BATCH_SIZE = 500
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.last_percent = -1
+
+    def report(self, done, total):
+        percent = int(done * 100 / total) if total > 0 else 100
+        # Only whole-percent changes cross over to the GUI thread
+        if percent != self.last_percent:
+            self.last_percent = percent
+            self.progress.emit(percent)
+
+    def import_file(self, path):
+        """Parse a bookmark file; bookmarks arrive in batches, deduplication is up to the receiver"""
+        from bookmark_io import iter_bookmark_file
+
+        def run():
+            self.last_percent = -1
+            count = 0
+            batch = []
+            try:
+                for bm in iter_bookmark_file(path, self.report):
+                    batch.append(bm)
+                    if len(batch) >= self.BATCH_SIZE:
+                        self.batch_ready.emit(batch)
+                        count += len(batch)
+                        batch = []
+                if batch:
+                    self.batch_ready.emit(batch)
+                    count += len(batch)
+            except (OSError, ValueError) as e:
+                print(f"Error importing bookmarks: {e}")
+                self.finished.emit("import", count, str(e))
+                return
+            self.finished.emit("import", count, "")
+        self.executor.submit(run)
+
+    def export_file(self, path, bookmarks):
+        """Write a snapshot of the bookmarks; the format follows the file extension"""
+        from bookmark_io import write_bookmark_file
+        snapshot = [{"url": bm["url"], "title": bm["title"]} for bm in bookmarks]
+
+        def run():
+            try:
+                write_bookmark_file(path, snapshot)
+            except OSError as e:
+                print(f"Error exporting bookmarks: {e}")
+                self.finished.emit("export", 0, str(e))
+                return
+            self.finished.emit("export", len(snapshot), "")
+        self.executor.submit(run)
+
+class HistoryModel(QAbstractItemModel):
+    """History grouped by date, fetched from the history store a page at a time.
+
+    Top-level rows are date groups (or a single results group while searching);
+    their children are visits. Only pages the view scrolls to are ever loaded.
+    """
+    HEADERS = ["📄 Page", "🌐 URL", "⏰ Time"]
+    PAGE_SIZE = 200
+
+    def __init__(self, history_search, parent=None):
+        super().__init__(parent)
+        self.history_search = history_search
+        self.history_search.results_ready.connect(self.on_results)
+        self.filter_text = ""
+        self.groups = []  # [label, [entries], row]
+        self.group_rows = {}  # label -> row in self.groups
+        self.loaded = 0
+        self.generation = None
+        self.pending = False
+        self.exhausted = True
+
+    def set_filter(self, text):
+        """Start over with a new search (an empty filter shows all history by date)"""
+        self.beginResetModel()
+        self.filter_text = text.strip()
+        self.groups = []
+        self.group_rows = {}
+        self.loaded = 0
+        self.exhausted = False
+        self.pending = True
+        self.generation = self.history_search.search(self.filter_text, 0, self.PAGE_SIZE)
+        self.endResetModel()
+
+    def date_label(self, timestamp, today):
+        entry_date = timestamp.date()
+        if entry_date == today:
+            return "📅 Today"
+        if entry_date == today - timedelta(days=1):
+            return "📅 Yesterday"
+        if entry_date > today - timedelta(days=7):
+            return f"📅 {timestamp.strftime('%A')}"
+        return f"📅 {timestamp.strftime('%B %d, %Y')}"
+
+    def add_group(self, label):
+        row = len(self.groups)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.groups.append([label, [], row])
+        self.group_rows[label] = row
+        self.endInsertRows()
+        return row
+
+    def on_results(self, generation, offset, entries):
+        if generation != self.generation:
+            return  # Results for a filter that has since changed
+        self.pending = False
+        self.exhausted = len(entries) < self.PAGE_SIZE
+        self.loaded = offset + len(entries)
+        if offset == 0 and not entries:
+            if self.filter_text:
+                self.add_group(f"🔍 No results for \"{self.filter_text}\"")
+            else:
+                self.add_group("No browsing history available")
+            return
+        # Ranked search results keep their order in one group; plain history is grouped by day
+        today = datetime.now().date()
+        runs = []
+        for entry in entries:
+            if self.filter_text:
+                label = f"🔍 Results for \"{self.filter_text}\""
+            else:
+                label = self.date_label(entry['timestamp'], today)
+            if runs and runs[-1][0] == label:
+                runs[-1][1].append(entry)
+            else:
+                runs.append((label, [entry]))
+        for label, run in runs:
+            row = self.group_rows.get(label)
+            if row is None:
+                row = self.add_group(label)
+            children = self.groups[row][1]
+            self.beginInsertRows(self.index(row, 0), len(children), len(children) + len(run) - 1)
+            children.extend(run)
+            self.endInsertRows()
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self.exhausted and not self.pending
+
+    def fetchMore(self, parent):
+        if self.canFetchMore(parent):
+            self.pending = True
+            self.history_search.search(self.filter_text, self.loaded, self.PAGE_SIZE)
+
+    # Indexes: group rows have no internal pointer, visit rows point at their group
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column)
+        return self.createIndex(row, column, self.groups[parent.row()])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        group = index.internalPointer()
+        if group is None:
+            return QModelIndex()
+        return self.createIndex(group[2], 0)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.groups)
+        if parent.internalPointer() is None:
+            return len(self.groups[parent.row()][1])
+        return 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.internalPointer() is None:
+            return Qt.ItemIsEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def entry(self, index):
+        """History entry dict behind a visit row, or None for group rows"""
+        if not index.isValid() or index.internalPointer() is None:
+            return None
+        return index.internalPointer()[1][index.row()]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        if index.internalPointer() is None:
+            if role == Qt.DisplayRole and column == 0:
+                return self.groups[index.row()][0]
+            if role == Qt.FontRole and column == 0:
+                font = QFont()
+                font.setBold(True)
+                return font
+            return None
+        entry = self.entry(index)
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return entry['title'][:60] + ("..." if len(entry['title']) > 60 else "")
+            if column == 1:
+                return entry['url']
+            return entry['timestamp'].strftime('%I:%M %p')
+        if role == Qt.ToolTipRole:
+            # Tooltips are computed on demand instead of stored per row
+            if column == 0:
+                return f"Title: {entry['title']}"
+            if column == 1:
+                return f"URL: {entry['url']}"
+            return f"Visited: {entry['timestamp'].strftime('%c')}"
+        if role == Qt.UserRole:
+            return entry['url']
+        return None
+
+class ToastOverlay(QLabel):
+    """Non-modal notifications shown one at a time over the bottom of the window.
+
+    Messages queue up and dismiss themselves; a backlog is shown faster, the
+    queue is capped (oldest dropped) and a message repeated within
+    repeat_window seconds is ignored. Click a toast to dismiss it early.
+    """
+    STYLES = {
+        "info": "background: rgba(32, 33, 36, 0.92); color: #fff;",
+        "warning": "background: rgba(183, 28, 28, 0.92); color: #fff;",
+    }
+
+    def __init__(self, parent, duration=2500, max_queue=5, repeat_window=3.0):
+        super().__init__(parent)
+        self.duration = duration
+        self.max_queue = max_queue
+        self.repeat_window = repeat_window
+        self.queue = deque()
+        self.recent = {}  # message -> time it was last posted
+        self.setWordWrap(True)
+        self.setAlignment(Qt.AlignCenter)
+        self.setMaximumWidth(480)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.show_next)
+        self.hide()
+
+    def post(self, text, level="info"):
+        """Queue a message; returns immediately"""
+        now = time.monotonic()
+        if now - self.recent.get(text, -self.repeat_window) < self.repeat_window:
+            return
+        self.recent = {t: posted for t, posted in self.recent.items() if now - posted < self.repeat_window}
+        self.recent[text] = now
+        if len(self.queue) >= self.max_queue:
+            self.queue.popleft()
+        self.queue.append((text, level))
+        if not self.timer.isActive():
+            self.show_next()
+
+    def show_next(self):
+        if not self.queue:
+            self.hide()
+            return
+        text, level = self.queue.popleft()
+        self.setStyleSheet(f"QLabel {{ {self.STYLES.get(level, self.STYLES['info'])} "
+                           "border-radius: 10px; padding: 10px 18px; font-size: 14px; }")
+        self.setText(text)
+        self.adjustSize()
+        parent = self.parentWidget()
+        self.move((parent.width() - self.width()) // 2, parent.height() - self.height() - 32)
+        self.show()
+        self.raise_()
+        self.timer.start(self.duration // 2 if self.queue else self.duration)
+
+    def mousePressEvent(self, event):
+        self.timer.stop()
+        self.show_next()
+
+class DownloadListModel(QAbstractListModel):
+    """Download dicts shown by the dropdown and the downloads dialog.
+
+    Progress updates only mark their row dirty; a frame-rate timer turns the
+    dirty rows into dataChanged signals, so views repaint at most one row per
+    download per frame. Nothing is emitted while no view is showing.
+    """
+    DownloadRole = Qt.UserRole
+
+    def __init__(self, parent=None, interval=33):
+        super().__init__(parent)
+        self.downloads = []
+        self.rows = {}  # id(download dict) -> row
+        self.dirty = set()
+        self.active_views = 0
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.flush)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.downloads)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        d = self.downloads[index.row()]
+        if role == self.DownloadRole:
+            return d
+        if role == Qt.DisplayRole:
+            return f"{d['filename']} - {d.get('status', 'In Progress')} ({d.get('progress', 0)}%)"
+        return None
+
+    def add(self, download):
+        row = len(self.downloads)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.downloads.append(download)
+        self.rows[id(download)] = row
+        self.endInsertRows()
+
+    def remove(self, download):
+        row = self.rows.get(id(download))
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.downloads[row]
+        self.rows = {id(d): i for i, d in enumerate(self.downloads)}
+        # Pending row numbers may have shifted; views repaint the remaining rows anyway
+        self.dirty.clear()
+        self.endRemoveRows()
+
+    def update(self, download):
+        """Schedule a repaint of one download's row"""
+        row = self.rows.get(id(download))
+        if row is None:
+            return
+        self.dirty.add(row)
+        if self.active_views and not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        if not self.dirty or not self.active_views:
+            self.timer.stop()
+            return
+        for row in self.dirty:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+        self.dirty.clear()
+
+    def attach_view(self):
+        """A view became visible; it paints everything fresh, so pending rows are dropped"""
+        self.active_views += 1
+        self.dirty.clear()
+
+    def detach_view(self):
+        self.active_views = max(0, self.active_views - 1)
+        if not self.active_views:
+            self.timer.stop()
+
+class DownloadItemDelegate(QStyledItemDelegate):
+    """Paints a download as name, progress bar, pause and cancel buttons without per-row widgets"""
+    ROW_HEIGHT = 44
+    BUTTON_WIDTH = 28
+    STATUS_COLORS = {'Completed': '#4caf50', 'Failed': '#e53935', 'Cancelled': '#bdbdbd', 'Paused': '#ffa000'}
+
+    def sizeHint(self, option, index):
+        return QSize(300, self.ROW_HEIGHT)
+
+    def cancel_rect(self, rect):
+        return QRect(rect.right() - self.BUTTON_WIDTH, rect.top(), self.BUTTON_WIDTH, rect.height())
+
+    def pause_rect(self, rect):
+        return QRect(rect.right() - 2 * self.BUTTON_WIDTH, rect.top(), self.BUTTON_WIDTH, rect.height())
+
+    def progress_text(self, d):
+        status = d.get('status', IN_PROGRESS)
+        text = f"{status} ({d.get('progress', 0)}%)"
+        if status == IN_PROGRESS and d.get('speed'):
+            text += f" · {format_bytes(d['speed'])}/s"
+            if d.get('eta') is not None:
+                text += f" · {format_eta(d['eta'])}"
+        return text
+
+    def paint(self, painter, option, index):
+        d = index.data(DownloadListModel.DownloadRole)
+        status = d.get('status', IN_PROGRESS)
+        progress = d.get('progress', 0)
+        content = option.rect.adjusted(4, 4, -4 - 2 * self.BUTTON_WIDTH, -4)
+        painter.save()
+        name = option.fontMetrics.elidedText(d['filename'], Qt.ElideMiddle, content.width())
+        painter.drawText(QRect(content.left(), content.top(), content.width(), 18), Qt.AlignLeft | Qt.AlignVCenter, name)
+        bar = QStyleOptionProgressBar()
+        bar.rect = QRect(content.left(), content.top() + 20, content.width(), 14)
+        bar.minimum = 0
+        bar.maximum = 100
+        bar.progress = progress
+        bar.text = self.progress_text(d)
+        bar.textVisible = True
+        bar.palette = option.palette
+        if status in self.STATUS_COLORS:
+            bar.palette.setColor(QPalette.Highlight, QColor(self.STATUS_COLORS[status]))
+        QApplication.style().drawControl(QStyle.CE_ProgressBar, bar, painter)
+        # Pause and cancel are only active until the download finishes
+        running = status in (IN_PROGRESS, PAUSED, QUEUED)
+        painter.setPen(QColor("#0078d4" if running else "#bdbdbd"))
+        painter.drawText(self.pause_rect(option.rect), Qt.AlignCenter, "⏸" if status == IN_PROGRESS else "▶")
+        painter.setPen(QColor("#e53935" if running else "#bdbdbd"))
+        painter.drawText(self.cancel_rect(option.rect), Qt.AlignCenter, "✖")
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() != QEvent.MouseButtonRelease:
+            return False
+        d = index.data(DownloadListModel.DownloadRole)
+        if d.get('status') not in (IN_PROGRESS, PAUSED, QUEUED):
+            return False
+        if self.cancel_rect(option.rect).contains(event.pos()):
+            d['cancel_callback']()
+            return True
+        if self.pause_rect(option.rect).contains(event.pos()):
+            d['pause_callback']()
+            return True
+        return False
+
+def create_download_view(model, parent=None):
+    view = QListView(parent)
+    view.setModel(model)
+    view.setItemDelegate(DownloadItemDelegate(view))
+    view.setUniformItemSizes(True)  # Lets the view skip measuring every row
+    view.setSelectionMode(QListView.NoSelection)
+    view.setMouseTracking(True)
+    return view
+
+class DownloadPromptBar(QFrame):
+    """Inline bar under the toolbar offering to change where a just-started download is saved"""
+    change_requested = pyqtSignal(object)
+    cancel_requested = pyqtSignal(object)
+
+    def __init__(self, parent=None, timeout=20000):
+        super().__init__(parent)
+        self.download = None
+        self.setStyleSheet("""
+            QFrame { background: #e8f0fe; border-bottom: 1px solid #c6dafc; }
+            QPushButton { background: none; border: 1px solid #0078d4; color: #0078d4; border-radius: 6px; padding: 3px 10px; }
+            QPushButton:hover { background-color: rgba(0, 120, 212, 0.08); }
+        """)
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(16, 6, 16, 6)
+        self.label = QLabel()
+        layout.addWidget(self.label, 1)
+        change_button = QPushButton("Change location…")
+        change_button.clicked.connect(lambda: self.change_requested.emit(self.download))
+        layout.addWidget(change_button)
+        cancel_button = QPushButton("Cancel download")
+        cancel_button.clicked.connect(self.on_cancel)
+        layout.addWidget(cancel_button)
+        close_button = QPushButton("✖")
+        close_button.setToolTip("Keep this location")
+        close_button.clicked.connect(self.hide)
+        layout.addWidget(close_button)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(timeout)
+        self.timer.timeout.connect(self.hide)
+        self.hide()
+
+    def show_download(self, download):
+        self.download = download
+        self.label.setText(f"Saving {download['filename']} to {os.path.dirname(download['path'])}")
+        self.show()
+        self.timer.start()
+
+    def on_cancel(self):
+        self.cancel_requested.emit(self.download)
+        self.hide()
 
 class DownloadManagerDialog(QDialog):
-    def __init__(self, downloads, parent=None):
+    def __init__(self, model, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Downloads")
         self.setMinimumSize(400, 300)
         layout = QVBoxLayout(self)
-        self.list_widget = QListWidget()
-        layout.addWidget(self.list_widget)
-        self.downloads = downloads
-        self.refresh()
-
-    def refresh(self):
-        self.list_widget.clear()
-        for d in self.downloads:
-            status = d.get('status', 'In Progress')
-            progress = d.get('progress', 0)
-            item_text = f"{d['filename']} - {status} ({progress}%)"
-            item = QListWidgetItem(item_text)
-            self.list_widget.addItem(item)
+        self.model = model
+        self.list_view = create_download_view(model)
+        layout.addWidget(self.list_view)
+
+    def showEvent(self, event):
+        self.model.attach_view()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.model.detach_view()
+        super().hideEvent(event)
 
 class DownloadDropdown(QFrame):
-    def __init__(self, parent=None):
+    MAX_VISIBLE_ROWS = 6
+
+    def __init__(self, model, parent=None):
         super().__init__(parent)
         self.setWindowFlags(self.windowFlags() | Qt.Popup)
         self.setFrameShape(QFrame.StyledPanel)
@@ -61,74 +890,36 @@ class DownloadDropdown(QFrame):
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(12, 12, 12, 12)
         self.layout.setSpacing(8)
-        self.download_widgets = []
-
-    def update_downloads(self, downloads):
-        # Remove old widgets
-        for w in self.download_widgets:
-            self.layout.removeWidget(w)
-            w.deleteLater()
-        self.download_widgets = []
-        if not downloads:
-            label = QLabel("No downloads yet.")
-            self.layout.addWidget(label)
-            self.download_widgets.append(label)
-            return
-        for d in downloads:
-            w = QWidget()
-            h = QHBoxLayout(w)
-            h.setContentsMargins(0, 0, 0, 0)
-            h.setSpacing(6)
-            v = QVBoxLayout()
-            v.setContentsMargins(0, 0, 0, 0)
-            v.setSpacing(2)
-            name = QLabel(d['filename'])
-            name.setMinimumWidth(120)
-            v.addWidget(name)
-            progress = QProgressBar()
-            progress.setValue(d.get('progress', 0))
-            progress.setMaximum(100)
-            progress.setTextVisible(True)
-            progress.setFormat(f"{d.get('status', 'In Progress')} (%p%)")
-            progress.setFixedHeight(14)  # Lower the height for a sleeker look
-            if d.get('status') == 'Completed':
-                progress.setStyleSheet("QProgressBar::chunk { background: #4caf50; }")
-            elif d.get('status') == 'Failed':
-                progress.setStyleSheet("QProgressBar::chunk { background: #e53935; }")
-            elif d.get('status') == 'Cancelled':
-                progress.setStyleSheet("QProgressBar::chunk { background: #bdbdbd; }")
-            v.addWidget(progress)
-            h.addLayout(v, 1)
-            # Cancel button
-            cancel_btn = QPushButton("✖")
-            cancel_btn.setFixedSize(24, 24)
-            cancel_btn.setToolTip("Cancel download")
-            cancel_btn.setStyleSheet("""
-                QPushButton {
-                    background: none;
-                    border: none;
-                    font-size: 14px;
-                    color: #e53935;
-                    border-radius: 12px;
-                }
-                QPushButton:hover:enabled {
-                    background-color: #ffeaea;
-                }
-            """)
-            # Only show cancel if in progress
-            if d.get('status') == 'In Progress':
-                cancel_btn.setEnabled(True)
-                cancel_btn.clicked.connect(d['cancel_callback'])
-            else:
-                cancel_btn.setEnabled(False)
-            h.addWidget(cancel_btn)
-            self.layout.addWidget(w)
-            self.download_widgets.append(w)
+        self.model = model
+        self.empty_label = QLabel("No downloads yet.")
+        self.layout.addWidget(self.empty_label)
+        self.list_view = create_download_view(model)
+        self.list_view.setStyleSheet("QListView { border: none; }")
+        self.layout.addWidget(self.list_view)
+        model.rowsInserted.connect(self.update_size)
+        self.update_size()
+
+    def update_size(self):
+        rows = self.model.rowCount()
+        self.empty_label.setVisible(rows == 0)
+        self.list_view.setVisible(rows > 0)
+        self.list_view.setFixedHeight(min(rows, self.MAX_VISIBLE_ROWS) * DownloadItemDelegate.ROW_HEIGHT + 4)
+        self.adjustSize()
+
+    def showEvent(self, event):
+        self.model.attach_view()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.model.detach_view()
+        super().hideEvent(event)
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.downloads = []  # Track download info for the download manager
+        # Downloads are scheduled by the download manager; the model repaints only changed rows
+        self.download_model = DownloadListModel(self)
+        self.downloads = self.download_model.downloads
         # Enable hardware acceleration and smooth scrolling for all QWebEngineViews
         os.environ["QTWEBENGINE_CHROMIUM_FLAGS"] = "--enable-gpu-rasterization --enable-zero-copy --enable-features=SmoothScrolling,TouchpadAndWheelScrollLatching,CompositorThreadedScroll"
         
@@ -139,13 +930,82 @@ class MainWindow(QMainWindow):
         self.showMaximized()  # Start maximized to cover full screen
         
       
+        # Per-user data (history database, ...) lives outside the package directory
+        self.data_dir = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
+        os.makedirs(self.data_dir, exist_ok=True)
+
         # History management
         self.history = []
         self.current_index = -1
+        self.history_store = HistoryStore(os.path.join(self.data_dir, "history.db"))
+
+        # Open tabs are journaled so the session survives restarts and crashes
+        self.session = SessionJournal(self.data_dir)
+        self.tab_ids = itertools.count(1)
+        self.session_timer = QTimer(self)
+        self.session_timer.setInterval(60000)
+        self.session_timer.timeout.connect(self.compact_session)
+        self.session_timer.start()
+        self.history_search = HistorySearch(self.history_store, self)
+        # Favicons seen while browsing, served to home page tiles through adapta://favicon
+        self.favicon_cache = FaviconCache(os.path.join(self.data_dir, "favicons"))
+        # Downloads start right away in a directory remembered per MIME type
+        self.download_settings = DownloadSettings(
+            os.path.join(self.data_dir, "download_settings.json"),
+            QStandardPaths.writableLocation(QStandardPaths.DownloadLocation) or os.path.expanduser("~"))
+        # Finished downloads from earlier sessions are listed along with new ones.
+        # ADAPTA_MAX_DOWNLOADS (default 3) limits how many transfer at once
+        self.download_manager = DownloadManager(os.path.join(self.data_dir, "downloads.jsonl"),
+                                                max_concurrent=env_int("ADAPTA_MAX_DOWNLOADS", 3), parent=self)
+        for d in self.download_manager.downloads:
+            self.download_model.add(d)
+        self.download_manager.added.connect(self.download_model.add)
+        self.download_manager.changed.connect(self.download_model.update)
+        self.download_manager.removed.connect(self.download_model.remove)
+        self.download_manager.finished.connect(self.on_download_finished)
+
+        # Background tabs are created as placeholders and only get a web view once selected
+        self.lazy_tabs = True
+
+        # Tab bar text/icon updates from all tabs are coalesced to one repaint per frame
+        self.dirty_tabs = set()
+        self.tab_bar_timer = QTimer(self)
+        self.tab_bar_timer.setSingleShot(True)
+        self.tab_bar_timer.setInterval(16)
+        self.tab_bar_timer.timeout.connect(self.flush_tab_bar_updates)
+
+        # Drive back/forward through QWebEngineHistory so Chromium can restore pages from
+        # its back-forward cache; the Python history is kept in step as a mirror for the UI
+        self.native_navigation = True
+
+        # Tab discarding: least recently used background tabs lose their web view once
+        # more than max_live_tabs are materialized or memory use exceeds memory_budget_mb.
+        # ADAPTA_MAX_LIVE_TABS defaults to 8; ADAPTA_MEMORY_BUDGET_MB is unset by default,
+        # which turns the memory check off (e.g. 2048 on low-memory kiosk machines)
+        self.max_live_tabs = env_int("ADAPTA_MAX_LIVE_TABS", 8)
+        self.memory_budget_mb = env_int("ADAPTA_MEMORY_BUDGET_MB")
+        self.memory_check_timer = QTimer(self)
+        self.memory_check_timer.setInterval(30000)
+        self.memory_check_timer.timeout.connect(self.enforce_tab_budget)
+        self.memory_check_timer.start()
 
         # Bookmarks initialization
-        self.bookmarks = []  # List of dicts: {"url": ..., "title": ..."}
+        self.bookmarks = BookmarkCollection()  # Dicts {"url": ..., "title": ...} indexed by normalized URL
         self.load_bookmarks()
+        self.bookmark_transfer = BookmarkTransfer(self)
+        self.bookmark_transfer.progress.connect(self.on_bookmark_transfer_progress)
+        self.bookmark_transfer.batch_ready.connect(self.on_bookmarks_imported)
+        self.bookmark_transfer.finished.connect(self.on_bookmark_transfer_finished)
+        self.bookmark_progress = None
+        self.imported_count = 0
+
+        # Serve the home page through adapta://home from memory
+        self.home_template = HomeTemplate(os.path.join(os.path.dirname(__file__), "home.html"))
+        self.home_scheme_handler = AdaptaSchemeHandler(self.create_home_page_html, self.create_fallback_html,
+                                                       self.favicon_cache, self)
+        QWebEngineProfile.defaultProfile().installUrlSchemeHandler(b"adapta", self.home_scheme_handler)
+        # All tabs share the default profile, so downloads are wired up once for the window
+        QWebEngineProfile.defaultProfile().downloadRequested.connect(self.handle_download_requested)
 
         # Create main widget and layout
         main_widget = QWidget()
@@ -340,6 +1200,14 @@ class MainWindow(QMainWindow):
             }
         """)
         self.mic_button.clicked.connect(self.handle_voice_command)
+        self.voice_worker = None
+        # The recognizer (and any offline model) is created once and reused for every command
+        self.voice_backend = create_recognizer_backend(self.data_dir)
+        self.voice_warmup = RecognizerWarmup(self.voice_backend, self)
+        self.voice_warmup.start()
+        self.wake_listener = None  # Running only while hands-free mode is on
+        self.stopping_listeners = set()  # Switched off, but their threads haven't finished yet
+        self.voice_handlers = self.create_voice_handlers()
         # Add mic button to toolbar (right before menu)
         toolbar_layout = self.toolbar.layout()
         toolbar_layout.insertWidget(toolbar_layout.count() - 1, self.mic_button)
@@ -350,10 +1218,14 @@ class MainWindow(QMainWindow):
         self.tabs.tabCloseRequested.connect(self.close_tab)
         self.tabs.currentChanged.connect(self.on_tab_changed)
         layout.addWidget(toolbar, 0)
+        self.download_prompt = DownloadPromptBar(self)
+        self.download_prompt.change_requested.connect(self.change_download_location)
+        self.download_prompt.cancel_requested.connect(lambda d: d and d['cancel_callback']())
+        layout.addWidget(self.download_prompt, 0)
         layout.addWidget(self.tabs, 0)
 
-        # Add first tab
-        self.add_new_tab()
+        # Reopen the last session, or start with a single home tab
+        self.restore_session()
 
         # Connect signals
         self.url_input.returnPressed.connect(self.navigate_to_url)
@@ -368,39 +1240,193 @@ class MainWindow(QMainWindow):
         self.apply_theme()
 
         # Download dropdown initialization
-        self.download_dropdown = DownloadDropdown(self)
+        self.download_dropdown = DownloadDropdown(self.download_model, self)
         self.download_dropdown.hide()
 
-    def add_new_tab(self, url=None):
-        tab = BrowserTab(is_dark_mode=self.is_dark_mode)
-        # Restore default QWebEngineView settings (no forced disabling of features)
-        tab.browser.settings().setAttribute(tab.browser.settings().Accelerated2dCanvasEnabled, True)
-        tab.browser.settings().setAttribute(tab.browser.settings().WebGLEnabled, True)
-        tab.browser.settings().setAttribute(tab.browser.settings().JavascriptEnabled, True)
-        tab.browser.settings().setAttribute(tab.browser.settings().LocalStorageEnabled, True)
-        tab.browser.setAttribute(Qt.WA_OpaquePaintEvent, True)
-        tab.browser.setAttribute(Qt.WA_NoSystemBackground, True)
-        tab.browser.setFocusPolicy(True)
-        idx = self.tabs.addTab(tab, "New Tab")
+        # Voice and download feedback, shown without blocking the event loop
+        self.toasts = ToastOverlay(self)
+
+    def add_new_tab(self, url=None, background=False, title=None, favicon=None):
+        """Open a new tab; background tabs stay placeholders until first selected"""
+        if isinstance(url, bool):  # Handle signal emission
+            url = None
+        tab = BrowserTab(is_dark_mode=self.is_dark_mode, url=url, title=title, favicon=favicon)
+        tab.session_id = next(self.tab_ids)
+        # Tab-level signals outlive discarded web views, so they are connected once here
+        tab.navigated.connect(self.on_tab_navigated)
+        tab.visited.connect(partial(self.record_visit, tab))
+        tab.title_recorded.connect(partial(self.record_title, tab))
+        tab.appearance_changed.connect(self.schedule_tab_bar_update)
+        tab.history_stepped.connect(self.record_step)
+        tab.url_replaced.connect(self.record_url_replaced)
+        tab.favicon_loaded.connect(self.cache_favicon)
+        idx = self.tabs.addTab(tab, tab.favicon, tab.title)
+        self.session.record('open', id=tab.session_id, url=url, title=tab.title)
+        if background and self.lazy_tabs:
+            return tab
         self.tabs.setCurrentIndex(idx)
-        tab.browser.urlChanged.connect(self.url_changed)
-        tab.browser.page().profile().downloadRequested.connect(self.handle_download_requested)
-        if url:
-            tab.browser.load(QUrl(url))
+        self.materialize_tab(tab)
+        return tab
+
+    def materialize_tab(self, tab):
+        """Create and wire up the web view of a placeholder tab, then load its page"""
+        if tab.is_materialized():
+            return
+        browser = tab.materialize()
+        # Restore default QWebEngineView settings (no forced disabling of features)
+        browser.settings().setAttribute(browser.settings().Accelerated2dCanvasEnabled, True)
+        browser.settings().setAttribute(browser.settings().WebGLEnabled, True)
+        browser.settings().setAttribute(browser.settings().JavascriptEnabled, True)
+        browser.settings().setAttribute(browser.settings().LocalStorageEnabled, True)
+        browser.setAttribute(Qt.WA_OpaquePaintEvent, True)
+        browser.setAttribute(Qt.WA_NoSystemBackground, True)
+        browser.setFocusPolicy(True)
+        if tab.scroll_position:
+            self.restore_scroll_position(tab)
+        if tab.url:
+            browser.load(QUrl(tab.url))
         else:
             self.go_home(tab=tab)
+        self.enforce_tab_budget()
+
+    def restore_scroll_position(self, tab):
+        """Scroll a restored tab back to where it was when it got discarded"""
+        x, y = tab.scroll_position
+        tab.scroll_position = None
+
+        def on_load_finished(ok):
+            tab.browser.loadFinished.disconnect(on_load_finished)
+            if ok:
+                tab.browser.page().runJavaScript(f"window.scrollTo({x}, {y});")
+        tab.browser.loadFinished.connect(on_load_finished)
+
+    def restore_session(self):
+        """Reopen the tabs of the last session as placeholders; only the selected one loads"""
+        state = self.session.load()
+        current_index = 0
+        # Keep on_tab_changed from materializing tabs while they are being added
+        self.tabs.blockSignals(True)
+        for saved in state['tabs']:
+            url = saved.get('url')
+            if url and is_home_url(url):
+                url = None
+            tab = self.add_new_tab(url, background=True, title=saved.get('title'))
+            tab.history.restore([NavigationEntry(entry_url, entry_title, datetime.fromtimestamp(visit_time))
+                                 for entry_url, entry_title, visit_time in saved.get('entries', [])],
+                                saved.get('index', -1))
+            if saved['id'] == state['current']:
+                current_index = self.tabs.count() - 1
+        self.tabs.blockSignals(False)
+        if self.tabs.count() == 0:
+            self.add_new_tab()
+        else:
+            self.tabs.setCurrentIndex(current_index)
+            self.on_tab_changed(current_index)
+        self.session.start(self.session_snapshot())
+
+    def session_snapshot(self):
+        """Full state of the open tabs, as written by a session compaction"""
+        tabs = []
+        for i in range(self.tabs.count()):
+            tab = self.tabs.widget(i)
+            url = tab.current_url()
+            tabs.append({
+                'id': tab.session_id,
+                'url': None if not url or is_home_url(url) else url,
+                'title': tab.current_title(),
+                'index': tab.history.index,
+                'entries': [[e.url, e.title, e.timestamp.timestamp()] for e in tab.history],
+            })
+        current = self.current_tab()
+        return {'current': current.session_id if current else None, 'tabs': tabs}
+
+    def compact_session(self):
+        if self.session.needs_compaction():
+            self.session.compact(self.session_snapshot())
 
     def close_tab(self, index):
         if self.tabs.count() > 1:
+            tab = self.tabs.widget(index)
             self.tabs.removeTab(index)
+            if tab:
+                self.session.record('close', id=tab.session_id)
+                # Pending tab bar repaints and late page signals must not reach a deleted tab
+                self.dirty_tabs.discard(tab)
+                for signal in (tab.navigated, tab.visited, tab.title_recorded, tab.appearance_changed,
+                               tab.history_stepped, tab.url_replaced, tab.favicon_loaded):
+                    signal.disconnect()
+                if tab.browser:
+                    tab.browser.deleteLater()
+                tab.deleteLater()
+
+    def process_memory_mb(self):
+        """Resident memory of this process and its renderer children in MB, if known"""
+        try:
+            pids = {os.getpid()}
+            parents = {}
+            for entry in os.listdir("/proc"):
+                if not entry.isdigit():
+                    continue
+                try:
+                    with open(f"/proc/{entry}/stat", "r") as f:
+                        stat = f.read()
+                    parents[int(entry)] = int(stat.rsplit(")", 1)[1].split()[1])
+                except (OSError, IndexError, ValueError):
+                    continue
+            # Collect all descendants (QtWebEngineProcess renderers, GPU process, ...)
+            changed = True
+            while changed:
+                changed = False
+                for pid, ppid in parents.items():
+                    if ppid in pids and pid not in pids:
+                        pids.add(pid)
+                        changed = True
+            total_kb = 0
+            for pid in pids:
+                try:
+                    with open(f"/proc/{pid}/status", "r") as f:
+                        for line in f:
+                            if line.startswith("VmRSS:"):
+                                total_kb += int(line.split()[1])
+                                break
+                except (OSError, ValueError):
+                    continue
+            return total_kb / 1024
+        except OSError:
+            # /proc is not available (e.g. Windows or macOS)
+            return None
+
+    def enforce_tab_budget(self):
+        """Discard least recently used background tabs until the budget is met"""
+        current = self.current_tab()
+        live_tabs = []
+        for i in range(self.tabs.count()):
+            tab = self.tabs.widget(i)
+            if tab and tab is not current and tab.is_materialized():
+                live_tabs.append(tab)
+        live_tabs.sort(key=lambda t: t.last_active)
+        # The current tab always stays alive and counts towards the budget
+        while live_tabs and len(live_tabs) + 1 > self.max_live_tabs:
+            live_tabs.pop(0).discard()
+        if self.memory_budget_mb is not None and live_tabs:
+            used = self.process_memory_mb()
+            # Renderer memory is only released after the deferred delete, so discard
+            # one tab per check and let the next timer tick re-measure
+            if used is not None and used > self.memory_budget_mb:
+                live_tabs.pop(0).discard()
 
     def on_tab_changed(self, index):
         """Handle tab change"""
         tab = self.current_tab()
+        if tab:
+            tab.last_active = time.monotonic()
+            self.session.record('select', id=tab.session_id)
+        if tab and not tab.is_materialized():
+            self.materialize_tab(tab)
         if tab and tab.browser:
             current_url = tab.browser.url().toString()
             # Handle special home page URL
-            if "adapta_home.html" in current_url:
+            if is_home_url(current_url):
                 self.url_input.setText("adapta://home")
             else:
                 self.url_input.setText(current_url)
@@ -564,49 +1590,18 @@ class MainWindow(QMainWindow):
     def create_home_page_html(self):
         """Create Safari-style home page HTML using external files and bookmarks"""
         import datetime
-        import os
-        current_time = datetime.datetime.now().strftime("%H:%M")
-        current_date = datetime.datetime.now().strftime("%A, %B %d")
-        # Read the HTML template
-        template_path = os.path.join(os.path.dirname(__file__), "home.html")
+        now = datetime.datetime.now()
+        bookmarks_html = "".join(render_bookmark_tile(bm["url"], bm["title"]) for bm in self.bookmarks)
         try:
-            with open(template_path, 'r', encoding='utf-8') as f:
-                html_template = f.read()
+            return self.home_template.render({
+                "current_time": now.strftime("%H:%M"),
+                "current_date": now.strftime("%A, %B %d"),
+                "theme_class": "dark" if self.is_dark_mode else "",
+                "bookmarks_html": bookmarks_html,
+            })
         except FileNotFoundError:
             # Fallback to inline HTML if file not found
             return self.create_fallback_html()
-        # Set theme class
-        theme_class = "dark" if self.is_dark_mode else ""
-        # Bookmarks HTML
-        bookmarks_html = ""
-        if self.bookmarks:
-            for bm in self.bookmarks:
-                # Extract domain for favicon/logo
-                import urllib.parse
-                parsed_url = urllib.parse.urlparse(bm["url"])
-                domain = parsed_url.netloc.lower()
-                
-                # Generate logo/favicon URL
-                favicon_url = f"https://www.google.com/s2/favicons?domain={domain}&sz=64"
-                
-                # Get first letter for fallback
-                first_letter = bm["title"][0].upper() if bm["title"] else "?"
-                
-                bookmarks_html += f'''
-                <div class="bookmark-container">
-                    <div class="bookmark-item" onclick="window.location.href='{bm["url"]}'">
-                        <div class="bookmark-logo" style="background-image: url('{favicon_url}'); background-size: cover; background-position: center;">
-                            <span style="display: none;">{first_letter}</span>
-                        </div>
-                    </div>
-                    <div class="bookmark-name">{bm["title"][:15] + ("..." if len(bm["title"]) > 15 else "")}</div>
-                </div>'''
-        # Replace placeholders
-        html_content = html_template.replace("{{current_time}}", current_time)
-        html_content = html_content.replace("{{current_date}}", current_date)
-        html_content = html_content.replace("{{theme_class}}", theme_class)
-        html_content = html_content.replace("{{bookmarks_html}}", bookmarks_html)
-        return html_content
 
     def create_fallback_html(self):
         """Fallback HTML if external files are not found, with bookmarks"""
@@ -618,27 +1613,7 @@ class MainWindow(QMainWindow):
         bookmarks_html = ""
         if self.bookmarks:
             bookmarks_html += '<div style="display: flex; flex-wrap: wrap; justify-content: center; gap: 20px; max-width: 960px; margin: 0 auto; margin-top: 32px;">'
-            for bm in self.bookmarks:
-                # Extract domain for favicon/logo
-                import urllib.parse
-                parsed_url = urllib.parse.urlparse(bm["url"])
-                domain = parsed_url.netloc.lower()
-                
-                # Generate logo/favicon URL
-                favicon_url = f"https://www.google.com/s2/favicons?domain={domain}&sz=64"
-                
-                # Get first letter for fallback
-                first_letter = bm["title"][0].upper() if bm["title"] else "?"
-                
-                bookmarks_html += f'''
-                <div style="display: flex; flex-direction: column; align-items: center; margin: 0 10px;">
-                    <div style="width: 100px; height: 100px; border: 1px solid rgba(255,255,255,0.2); border-radius: 20px; padding: 10px; text-align: center; cursor: pointer; background: rgba(45,45,45,0.7); backdrop-filter: blur(10px); display: flex; flex-direction: column; justify-content: center; align-items: center; transition: all 0.3s ease; box-shadow: 0 4px 20px rgba(0,0,0,0.1); margin-bottom: 8px;" onclick="window.location.href='{bm["url"]}'">
-                        <div style="width: 50px; height: 50px; border-radius: 12px; background-image: url('{favicon_url}'); background-size: cover; background-position: center; background-color: #fff; display: flex; align-items: center; justify-content: center; font-size: 24px; font-weight: bold; color: #333;">
-                            <span style="display: none;">{first_letter}</span>
-                        </div>
-                    </div>
-                    <div style="font-size: 0.85rem; font-weight: 500; text-align: center; max-width: 100px; line-height: 1.2; color: inherit;">{bm["title"][:15] + ("..." if len(bm["title"]) > 15 else "")}</div>
-                </div>'''
+            bookmarks_html += "".join(render_bookmark_tile(bm["url"], bm["title"], fallback=True) for bm in self.bookmarks)
             bookmarks_html += '</div>'
         return f"""
         <!DOCTYPE html>
@@ -668,49 +1643,15 @@ class MainWindow(QMainWindow):
             tab = self.current_tab()
         if not tab:
             return
+        if not tab.is_materialized():
+            # Placeholder tabs render the home page once they are selected
+            tab.url = None
+            return
             
-        home_html = self.create_home_page_html()
-        import tempfile
-        import os
-        import shutil
-        
-        temp_dir = tempfile.gettempdir()
-        home_file = os.path.join(temp_dir, "adapta_home.html")
-        
-        try:
-            # Write the HTML file
-            with open(home_file, 'w', encoding='utf-8') as f:
-                f.write(home_html)
-            
-            # Copy CSS and JS files to temp directory if they exist
-            script_dir = os.path.dirname(__file__)
-            css_source = os.path.join(script_dir, "home.css")
-            js_source = os.path.join(script_dir, "home.js")
-            
-            css_dest = os.path.join(temp_dir, "home.css")
-            js_dest = os.path.join(temp_dir, "home.js")
-            
-            if os.path.exists(css_source):
-                shutil.copy2(css_source, css_dest)
-            
-            if os.path.exists(js_source):
-                shutil.copy2(js_source, js_dest)
-            
-            home_url = QUrl.fromLocalFile(home_file)
-            tab.browser.load(home_url)
-            
-            # Only update URL input if this is the current tab
-            if tab == self.current_tab():
-                self.url_input.setText("adapta://home")
-                
-        except Exception as e:
-            print(f"Error creating home page: {e}")
-            # Load fallback HTML directly
-            fallback_html = self.create_fallback_html()
-            with open(home_file, 'w', encoding='utf-8') as f:
-                f.write(fallback_html)
-            home_url = QUrl.fromLocalFile(home_file)
-            tab.browser.load(home_url)
+        tab.browser.load(QUrl(HOME_URL))
+        # Only update URL input if this is the current tab
+        if tab == self.current_tab():
+            self.url_input.setText("adapta://home")
 
     def is_valid_url(self, string):
         """Check if string is a valid URL"""
@@ -728,7 +1669,7 @@ class MainWindow(QMainWindow):
             return ""
         
         # If it's already a valid URL, return as is
-        if input_text.startswith(('http://', 'https://')):
+        if input_text.startswith(('http://', 'https://', 'adapta://')):
             return input_text
         
         # Check if it looks like a domain
@@ -756,82 +1697,105 @@ class MainWindow(QMainWindow):
             qurl = QUrl(formatted_url)
             tab.browser.load(qurl)
 
-    def url_changed(self, qurl):
-        """Update URL input when page changes and update favicon"""
-        # Find which tab triggered this signal
-        sender_browser = self.sender()
-        current_tab = self.current_tab()
-        # Only update if this is the current tab
-        if current_tab and sender_browser == current_tab.browser:
-            url = qurl.toString()
-            # Only update if URL actually changed
-            if self.url_input.text() != url:
-                self.url_input.setText(url)
-            # Update favicon in tab only
-            def set_favicon():
-                icon = current_tab.browser.icon()
-                tab_index = self.tabs.indexOf(current_tab)
-                if tab_index >= 0:
-                    self.tabs.setTabIcon(tab_index, icon)
-            current_tab.browser.iconChanged.connect(lambda _: set_favicon())
-            set_favicon()
-            
-            # Update history per tab
-            from datetime import datetime
-            current_url = current_tab.browser.url().toString()
-            current_title = current_tab.browser.title() or current_url
-            current_time = datetime.now()
-            
-            # Check if this URL is already the current history entry
-            if (not current_tab.history or 
-                current_tab.current_index < 0 or 
-                (isinstance(current_tab.history[current_tab.current_index], dict) and 
-                 current_tab.history[current_tab.current_index]['url'] != current_url) or
-                (isinstance(current_tab.history[current_tab.current_index], str) and 
-                 current_tab.history[current_tab.current_index] != current_url)):
-                
-                # Remove forward history if we're not at the end
-                if current_tab.current_index < len(current_tab.history) - 1:
-                    current_tab.history = current_tab.history[:current_tab.current_index + 1]
-                
-                # Create history entry with detailed information
-                history_entry = {
-                    'url': current_url,
-                    'title': current_title,
-                    'timestamp': current_time,
-                    'favicon': current_tab.browser.icon()
-                }
-                current_tab.history.append(history_entry)
-                current_tab.current_index = len(current_tab.history) - 1
-            
-            self.update_navigation_buttons()
-            # Update tab title
-            tab_index = self.tabs.indexOf(current_tab)
+    def on_tab_navigated(self, tab, url):
+        """Reflect a navigation in the toolbar if it happened in the current tab"""
+        if tab is not self.current_tab():
+            return
+        display_url = "adapta://home" if is_home_url(url) else url
+        # Only update if URL actually changed
+        if self.url_input.text() != display_url:
+            self.url_input.setText(display_url)
+        self.update_navigation_buttons()
+        self.update_bookmark_icon()
+
+    def record_visit(self, tab, url, title, timestamp):
+        self.session.record('visit', id=tab.session_id, url=url, title=title,
+                            timestamp=timestamp.timestamp())
+        if not is_home_url(url):
+            self.history_store.add_visit(url, title, timestamp)
+
+    def record_title(self, tab, url, title):
+        self.session.record('title', id=tab.session_id, title=title)
+        if not is_home_url(url):
+            self.history_store.update_title(url, title)
+
+    def record_step(self, tab):
+        self.session.record('step', id=tab.session_id, index=tab.history.index)
+
+    def record_url_replaced(self, tab, url):
+        self.session.record('replace', id=tab.session_id, index=tab.history.index, url=url)
+
+    def record_history_reset(self, tab):
+        """Journal a tab's whole back/forward list after it was edited in place"""
+        self.session.record('reset', id=tab.session_id, index=tab.history.index,
+                            entries=[[e.url, e.title, e.timestamp.timestamp()] for e in tab.history])
+
+    def cache_favicon(self, domain, icon):
+        """Store a page's favicon on disk; unchanged icons aren't rewritten"""
+        if not domain:
+            return
+        buffer = QBuffer()
+        buffer.open(QIODevice.WriteOnly)
+        if icon.pixmap(64, 64).save(buffer, "PNG"):
+            self.favicon_cache.put(domain, bytes(buffer.data()))
+
+    def schedule_tab_bar_update(self, tab):
+        """Queue a tab's text/icon refresh; the tab bar is repainted at most once per frame"""
+        self.dirty_tabs.add(tab)
+        if not self.tab_bar_timer.isActive():
+            self.tab_bar_timer.start()
+
+    def flush_tab_bar_updates(self):
+        dirty_tabs, self.dirty_tabs = self.dirty_tabs, set()
+        for tab in dirty_tabs:
+            tab_index = self.tabs.indexOf(tab)
             if tab_index >= 0:
-                self.tabs.setTabText(tab_index, self.page_title(current_tab))
-            self.update_bookmark_icon()
+                self.tabs.setTabText(tab_index, self.page_title(tab))
+                self.tabs.setTabIcon(tab_index, tab.favicon)
 
     def page_title(self, tab):
-        title = tab.browser.title() or "New Tab"
+        title = tab.current_title() or "New Tab"
         return title[:20] + ("..." if len(title) > 20 else "")
 
     def go_back(self):
         """Go back in history"""
         tab = self.current_tab()
-        if tab and tab.current_index > 0:
-            tab.current_index -= 1
-            history_entry = tab.history[tab.current_index]
-            url = history_entry['url'] if isinstance(history_entry, dict) else history_entry
-            tab.browser.load(QUrl(url))
+        if not tab or not tab.browser:
+            return
+        web_history = tab.browser.history()
+        previous = tab.history.entries[tab.history.index - 1] if tab.history.can_go_back() else None
+        # Chromium's list can be shorter than the mirror (e.g. after a discarded tab was
+        # restored), so its back item is only used when it is the page the mirror expects
+        if (self.native_navigation and previous is not None and web_history.canGoBack()
+                and web_history.backItem().url().toString() == previous.url):
+            # Step the mirror first so on_url_changed finds the entry instead of adding one
+            tab.history.back()
+            self.session.record('step', id=tab.session_id, index=tab.history.index)
+            tab.browser.back()
+            return
+        # Chromium has no entry to go back to (e.g. the tab was discarded and restored)
+        entry = tab.history.back()
+        if entry:
+            self.session.record('step', id=tab.session_id, index=tab.history.index)
+            tab.browser.load(QUrl(entry.url))
 
     def go_forward(self):
         """Go forward in history"""
         tab = self.current_tab()
-        if tab and tab.current_index < len(tab.history) - 1:
-            tab.current_index += 1
-            history_entry = tab.history[tab.current_index]
-            url = history_entry['url'] if isinstance(history_entry, dict) else history_entry
-            tab.browser.load(QUrl(url))
+        if not tab or not tab.browser:
+            return
+        web_history = tab.browser.history()
+        following = tab.history.entries[tab.history.index + 1] if tab.history.can_go_forward() else None
+        if (self.native_navigation and following is not None and web_history.canGoForward()
+                and web_history.forwardItem().url().toString() == following.url):
+            tab.history.forward()
+            self.session.record('step', id=tab.session_id, index=tab.history.index)
+            tab.browser.forward()
+            return
+        entry = tab.history.forward()
+        if entry:
+            self.session.record('step', id=tab.session_id, index=tab.history.index)
+            tab.browser.load(QUrl(entry.url))
 
     def reload_page(self):
         """Reload current page"""
@@ -843,8 +1807,11 @@ class MainWindow(QMainWindow):
         """Update navigation button states"""
         tab = self.current_tab()
         if tab:
-            self.back_button.setEnabled(tab.current_index > 0)
-            self.forward_button.setEnabled(tab.current_index < len(tab.history) - 1)
+            web_history = tab.browser.history() if tab.browser and self.native_navigation else None
+            self.back_button.setEnabled(tab.history.can_go_back() or
+                                        bool(web_history and web_history.canGoBack()))
+            self.forward_button.setEnabled(tab.history.can_go_forward() or
+                                           bool(web_history and web_history.canGoForward()))
         else:
             self.back_button.setEnabled(False)
             self.forward_button.setEnabled(False)
@@ -857,20 +1824,20 @@ class MainWindow(QMainWindow):
         url = tab.browser.url().toString()
         title = tab.browser.title() or url
         # Check if already bookmarked
-        for bm in self.bookmarks:
-            if bm["url"] == url:
-                self.bookmarks.remove(bm)
-                self.bookmark_button.setText("☆")  # Outline star
-                self.bookmark_button.setToolTip("Bookmark this page")
-                self.save_bookmarks()
-                self.update_home_bookmarks()
-                return
+        removed = self.bookmarks.remove(url)
+        if removed is not None:
+            self.bookmark_button.setText("☆")  # Outline star
+            self.bookmark_button.setToolTip("Bookmark this page")
+            self.save_bookmarks()
+            self.update_home_bookmarks(removed_url=removed["url"])
+            return
         # Add new bookmark
-        self.bookmarks.append({"url": url, "title": title})
+        bookmark = {"url": url, "title": title}
+        self.bookmarks.add(bookmark)
         self.bookmark_button.setText("★")  # Filled star
         self.bookmark_button.setToolTip("Remove bookmark")
         self.save_bookmarks()
-        self.update_home_bookmarks()  # Save changes to bookmarks
+        self.update_home_bookmarks(added=bookmark)
 
     def update_bookmark_icon(self):
         """Update the star icon based on whether current page is bookmarked"""
@@ -879,28 +1846,35 @@ class MainWindow(QMainWindow):
             self.bookmark_button.setText("☆")
             self.bookmark_button.setToolTip("Bookmark this page")
             return
-        url = tab.browser.url().toString()
-        for bm in self.bookmarks:
-            if bm["url"] == url:
-                self.bookmark_button.setText("★")
-                self.bookmark_button.setToolTip("Remove bookmark")
-                return
+        if tab.current_url() in self.bookmarks:
+            self.bookmark_button.setText("★")
+            self.bookmark_button.setToolTip("Remove bookmark")
+            return
         self.bookmark_button.setText("☆")
         self.bookmark_button.setToolTip("Bookmark this page")
 
-    def update_home_bookmarks(self):
-        """Force refresh of home page if visible to update bookmarks grid"""
+    def update_home_bookmarks(self, added=None, removed_url=None):
+        """Patch the bookmarks grid of open home pages in place"""
+        if added is not None:
+            call = f"window.AdaptaHome.addBookmark({json.dumps(render_bookmark_tile(added['url'], added['title']))});"
+        elif removed_url is not None:
+            call = f"window.AdaptaHome.removeBookmark({json.dumps(removed_url)});"
+        else:
+            bookmarks_html = "".join(render_bookmark_tile(bm["url"], bm["title"]) for bm in self.bookmarks)
+            call = f"window.AdaptaHome.setBookmarks({json.dumps(bookmarks_html)});"
+        self.patch_home_pages(call)
+
+    def patch_home_pages(self, call):
+        """Run an AdaptaHome call in every loaded home page; pages without the API are reloaded"""
+        script = f"if (window.AdaptaHome) {{ {call} }} else {{ location.reload(); }}"
         for i in range(self.tabs.count()):
             tab = self.tabs.widget(i)
-            if tab and tab.browser:
-                current_url = tab.browser.url().toString()
-                if "adapta_home.html" in current_url or "adapta://home" in current_url:
-                    self.go_home(tab=tab)
+            # Placeholder and discarded tabs render a fresh home page when selected
+            if tab and tab.browser and is_home_url(tab.browser.url().toString()):
+                tab.browser.page().runJavaScript(script)
 
     def load_bookmarks(self):
-        """Load bookmarks from a JSON file if it exists, otherwise use defaults"""
-        import os
-        
+        """Load bookmarks from the user's data directory, otherwise use defaults"""
         # Default bookmarks if no file exists
         default_bookmarks = [
             {
@@ -909,80 +1883,133 @@ class MainWindow(QMainWindow):
             }
         ]
         
-        try:
-            bookmarks_path = os.path.join(os.path.dirname(__file__), "bookmarks.json")
-            if os.path.exists(bookmarks_path):
-                with open(bookmarks_path, "r", encoding="utf-8") as f:
-                    self.bookmarks = json.load(f)
-            else:
-                # No file exists, use defaults and create the file
-                self.bookmarks = default_bookmarks.copy()
-                self.save_bookmarks()  # Create the file with defaults
-        except Exception as e:
-            print(f"Error loading bookmarks: {e}")
-            # Fallback to defaults if there's an error
-            self.bookmarks = default_bookmarks.copy()
+        # The bookmarks.json shipped next to this file only seeds a new profile; the
+        # package directory may be read-only
+        self.bookmark_store = BookmarkStore(
+            os.path.join(self.data_dir, "bookmarks.json"),
+            fallback_paths=[os.path.join(os.path.dirname(__file__), "bookmarks.json")])
+        bookmarks = self.bookmark_store.load()
+        if bookmarks is None:
+            # No file exists, use defaults and create the file
+            self.bookmarks = BookmarkCollection(default_bookmarks)
+            self.save_bookmarks()
+        else:
+            self.bookmarks = BookmarkCollection(bookmarks)
 
     def save_bookmarks(self):
-        """Save bookmarks to a JSON file"""
-        import os
-        try:
-            bookmarks_path = os.path.join(os.path.dirname(__file__), "bookmarks.json")
-            with open(bookmarks_path, "w", encoding="utf-8") as f:
-                json.dump(self.bookmarks, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Error saving bookmarks: {e}")
+        """Save bookmarks in the background; rapid changes are coalesced into one write"""
+        self.bookmark_store.save(self.bookmarks)
+
+    def import_bookmarks(self):
+        """Import a Netscape HTML or Chrome JSON bookmark file without blocking the window"""
+        from PyQt5.QtWidgets import QFileDialog
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Bookmarks", "",
+            "Bookmark files (*.html *.htm *.json Bookmarks);;All files (*)")
+        if not path:
+            return
+        self.imported_count = 0
+        self.show_bookmark_progress("Importing bookmarks...")
+        self.bookmark_transfer.import_file(path)
+
+    def export_bookmarks(self):
+        """Export bookmarks as Netscape HTML or Chrome JSON, depending on the chosen extension"""
+        from PyQt5.QtWidgets import QFileDialog
+        path, selected = QFileDialog.getSaveFileName(
+            self, "Export Bookmarks", "bookmarks.html",
+            "Netscape bookmark file (*.html);;Chrome bookmarks (*.json)")
+        if not path:
+            return
+        if not os.path.splitext(path)[1]:
+            path += ".json" if "json" in selected else ".html"
+        self.show_bookmark_progress("Exporting bookmarks...")
+        self.bookmark_transfer.export_file(path, self.bookmarks)
+
+    def show_bookmark_progress(self, label):
+        from PyQt5.QtWidgets import QProgressDialog
+        # Non-modal: the browser stays usable while the file is processed
+        self.bookmark_progress = QProgressDialog(label, None, 0, 100, self)
+        self.bookmark_progress.setWindowTitle("Bookmarks")
+        self.bookmark_progress.setWindowModality(Qt.NonModal)
+        self.bookmark_progress.setMinimumDuration(300)
+        self.bookmark_progress.setValue(0)
+
+    def on_bookmark_transfer_progress(self, percent):
+        if self.bookmark_progress is not None:
+            self.bookmark_progress.setValue(percent)
+
+    def on_bookmarks_imported(self, batch):
+        """Merge a batch of imported bookmarks; URLs already bookmarked are skipped"""
+        for bm in batch:
+            if self.bookmarks.add({"url": bm["url"], "title": bm["title"]}):
+                self.imported_count += 1
+
+    def on_bookmark_transfer_finished(self, kind, count, error):
+        from PyQt5.QtWidgets import QMessageBox
+        if self.bookmark_progress is not None:
+            self.bookmark_progress.close()
+            self.bookmark_progress = None
+        if kind == "import":
+            if self.imported_count:
+                self.save_bookmarks()
+                self.update_home_bookmarks()
+                self.update_bookmark_icon()
+            message = f"Imported {self.imported_count} bookmarks ({count - self.imported_count} already bookmarked)."
+        else:
+            message = f"Exported {count} bookmarks."
+        if error:
+            QMessageBox.warning(self, "Bookmarks", f"{message}\n\nError: {error}")
+        else:
+            QMessageBox.information(self, "Bookmarks", message)
 
     def handle_download_requested(self, download):
-        """Handle file download requests"""
-        from PyQt5.QtWidgets import QFileDialog, QMessageBox
-        suggested_path = download.path()
-        # Ask user where to save the file
-        save_path, _ = QFileDialog.getSaveFileName(self, "Save File", suggested_path)
-        if save_path:
-            download.setPath(save_path)
-            download.accept()
-            download_info = {
-                'filename': os.path.basename(save_path),
-                'status': 'In Progress',
-                'progress': 0
-            }
-            # Now that download_info exists, add the cancel_callback
-            download_info['cancel_callback'] = partial(self.cancel_download, download, download_info)
-            self.downloads.append(download_info)
-            def on_progress(received, total):
-                percent = int(received * 100 / total) if total > 0 else 0
-                download_info['progress'] = percent
-                self.download_dropdown.update_downloads(self.downloads)
-            def on_finished():
-                if download.state() == download.DownloadCancelled:
-                    download_info['status'] = 'Cancelled'
-                elif download.state() == download.DownloadCompleted:
-                    download_info['status'] = 'Completed'
-                    download_info['progress'] = 100
-                else:
-                    download_info['status'] = 'Failed'
-                self.download_dropdown.update_downloads(self.downloads)
-            download.downloadProgress.connect(on_progress)
-            download.finished.connect(on_finished)
-            QMessageBox.information(self, "Download Started", f"Downloading to: {save_path}")
-            self.download_dropdown.update_downloads(self.downloads)
+        """Start every download immediately in its remembered directory; nothing blocks the window"""
+        mime_type = download.mimeType()
+        directory = self.download_settings.directory_for(mime_type)
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            print(f"Error creating download directory {directory}: {e}")
+            directory = self.download_settings.default_directory
+        path = unique_path(directory, os.path.basename(download.path()), self.download_manager.reserved_paths())
+        d = self.download_manager.start(download, path)
+        if self.download_settings.ask_where:
+            self.download_prompt.show_download(d)
+        elif d['status'] == QUEUED:
+            self.toasts.post(f"Queued: {d['filename']}")
         else:
-            download.cancel()
-        # Hide dropdown if no downloads
-        if not self.downloads:
-            self.download_dropdown.hide()
+            self.toasts.post(f"Downloading to: {path}")
+
+    def change_download_location(self, d):
+        """Pick another path for a running download without a modal dialog; the file moves once complete"""
+        from PyQt5.QtWidgets import QFileDialog
+        if d is None:
+            return
+        dialog = QFileDialog(self, "Save File", d.get('move_to') or d['path'])
+        dialog.setAcceptMode(QFileDialog.AcceptSave)
+        dialog.setWindowModality(Qt.NonModal)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+
+        def on_selected(path):
+            self.download_manager.relocate(d, path)
+            self.download_settings.remember(d['mime_type'], os.path.dirname(path))
+            self.toasts.post(f"Saving to: {path}")
+        dialog.fileSelected.connect(on_selected)
+        dialog.show()
+
+    def toggle_ask_where_to_save(self, checked):
+        self.download_settings.ask_where = checked
+        self.download_settings.save()
 
-    def cancel_download(self, download, download_info):
-        download.cancel()
-        download_info['status'] = 'Cancelled'
-        self.download_dropdown.update_downloads(self.downloads)
+    def on_download_finished(self, d):
+        if d['status'] != CANCELLED:
+            self.toasts.post(f"Download {d['status'].lower()}: {d['filename']}",
+                             "info" if d['status'] == COMPLETED else "warning")
 
     def toggle_download_dropdown(self):
         if self.download_dropdown.isVisible():
             self.download_dropdown.hide()
         else:
-            self.download_dropdown.update_downloads(self.downloads)
             # Position dropdown aligned to the left of the download button
             btn_pos = self.download_button.mapToGlobal(self.download_button.rect().bottomLeft())
             dropdown_width = self.download_dropdown.sizeHint().width()
@@ -993,7 +2020,7 @@ class MainWindow(QMainWindow):
             self.download_dropdown.show()
 
     def show_downloads(self):
-        dlg = DownloadManagerDialog(self.downloads, self)
+        dlg = DownloadManagerDialog(self.download_model, self)
         dlg.exec_()
 
     def show_menu(self):
@@ -1026,6 +2053,18 @@ class MainWindow(QMainWindow):
         menu.addSeparator()
         menu.addAction("� History", self.open_history)
         menu.addAction("⬇️ Downloads", self.show_downloads)
+        ask_where = menu.addAction("📁 Ask Where to Save Downloads", self.toggle_ask_where_to_save)
+        ask_where.setCheckable(True)
+        ask_where.setChecked(self.download_settings.ask_where)
+        hands_free_label = "🎙️ Hands-free Voice"
+        if not self.voice_backend.local_spotter:
+            hands_free_label += " (needs offline recognition)"
+        hands_free = menu.addAction(hands_free_label, self.toggle_hands_free)
+        hands_free.setCheckable(True)
+        hands_free.setChecked(self.wake_listener is not None)
+        hands_free.setEnabled(self.voice_backend.local_spotter)
+        menu.addAction("📥 Import Bookmarks", self.import_bookmarks)
+        menu.addAction("📤 Export Bookmarks", self.export_bookmarks)
         menu.addAction("⚙️ Settings", self.open_settings)
         
         # Show menu at button position
@@ -1038,13 +2077,8 @@ class MainWindow(QMainWindow):
         self.is_dark_mode = not self.is_dark_mode
         self.apply_theme()
         
-        # Refresh home page for all tabs that are currently showing home page
-        for i in range(self.tabs.count()):
-            tab = self.tabs.widget(i)
-            if tab and tab.browser:
-                current_url = tab.browser.url().toString()
-                if "adapta_home.html" in current_url or "adapta://home" in current_url:
-                    self.go_home(tab=tab)
+        # Switch the theme of open home pages without reloading them
+        self.patch_home_pages(f"window.AdaptaHome.setTheme({json.dumps(self.is_dark_mode)});")
 
     def open_dev_tools(self):
         """Open developer tools (placeholder)"""
@@ -1057,205 +2091,165 @@ class MainWindow(QMainWindow):
         QMessageBox.information(self, "Settings", "Settings panel coming soon!")
 
     def handle_voice_command(self):
-        """Handle voice commands for browser navigation and control"""
-        recognizer = sr.Recognizer()
-        
-        # Show listening indicator
-        self.mic_button.setText("🔴")  # Red dot to indicate listening
-        self.mic_button.setIcon(QIcon())  # Clear icon when showing listening text
-        self.mic_button.setToolTip("Listening...")
-        
-        try:
-            with sr.Microphone() as source:
-                # Adjust for ambient noise
-                recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                
-                # Show listening dialog
-                QMessageBox.information(self, "Voice Command", "Listening... Please speak your command.\n\nExample commands:\n• 'Go to YouTube'\n• 'Open new tab'\n• 'Go back'\n• 'Reload page'\n• 'Switch to dark mode'\n• 'Enable light mode'\n• 'Search for cats'")
-                
-                # Listen for audio
-                audio = recognizer.listen(source, timeout=8, phrase_time_limit=5)
-                
-                # Recognize speech
-                command = recognizer.recognize_google(audio).lower()
-                print(f"Voice command received: {command}")
-                
-                # Process the command
-                self.process_voice_command(command)
-                
-        except sr.WaitTimeoutError:
-            QMessageBox.warning(self, "Voice Command", "No speech detected. Please try again.")
-        except sr.UnknownValueError:
-            QMessageBox.warning(self, "Voice Command", "Could not understand the command. Please try again.")
-        except sr.RequestError as e:
-            QMessageBox.warning(self, "Voice Command", f"Speech recognition service error: {e}")
-        except Exception as e:
-            QMessageBox.warning(self, "Voice Command", f"An error occurred: {e}")
-        finally:
-            # Reset microphone button
-            mic_icon = self.load_svg_icon("microphone-solid.svg", size=(24, 24))
-            if mic_icon:
-                self.mic_button.setIcon(mic_icon)
-                self.mic_button.setText("")  # Clear any text when using icon
-            else:
-                self.mic_button.setText("🎤")
-            self.mic_button.setToolTip("Voice Command - Click to speak")
-
-    def process_voice_command(self, command):
-        """Process and execute voice commands"""
-        command = command.strip().lower()
-        
-        # Navigation commands
-        if any(phrase in command for phrase in ["go to", "open", "navigate to", "visit"]):
-            # Extract the site name/URL
-            for phrase in ["go to", "open", "navigate to", "visit"]:
-                if phrase in command:
-                    site = command.split(phrase, 1)[1].strip()
-                    if site:
-                        # Handle common site shortcuts
-                        shortcuts = {
-                            "youtube": "https://www.youtube.com",
-                            "google": "https://www.google.com",
-                            "facebook": "https://www.facebook.com",
-                            "twitter": "https://www.twitter.com",
-                            "instagram": "https://www.instagram.com",
-                            "reddit": "https://www.reddit.com",
-                            "wikipedia": "https://www.wikipedia.org",
-                            "github": "https://www.github.com"
-                        }
-                        
-                        url = shortcuts.get(site, site)
-                        self.url_input.setText(url)
-                        self.navigate_to_url()
-                        QMessageBox.information(self, "Voice Command", f"Navigating to: {site}")
-                        return
-        
-        # Tab management commands
-        elif "new tab" in command or "open tab" in command:
-            self.add_new_tab()
-            QMessageBox.information(self, "Voice Command", "New tab opened")
-            return
-            
-        elif "close tab" in command:
-            if self.tabs.count() > 1:
-                self.close_tab(self.tabs.currentIndex())
-                QMessageBox.information(self, "Voice Command", "Tab closed")
-            else:
-                QMessageBox.information(self, "Voice Command", "Cannot close the last tab")
+        """Capture and recognize a voice command on a worker thread; the window stays responsive"""
+        if self.wake_listener is not None:
+            # Hands-free mode already holds the microphone; take the next utterance as a command
+            self.wake_listener.arm()
             return
-            
-        elif any(phrase in command for phrase in ["switch to", "go to tab"]):
-            # Switch to specific tab
-            for phrase in ["switch to", "go to tab"]:
-                if phrase in command:
-                    tab_name = command.split(phrase, 1)[1].strip()
-                    found = False
-                    for i in range(self.tabs.count()):
-                        tab = self.tabs.widget(i)
-                        if tab and tab.browser:
-                            title = tab.browser.title().lower() if tab.browser.title() else ""
-                            url = tab.browser.url().toString().lower()
-                            if tab_name in title or tab_name in url:
-                                self.tabs.setCurrentIndex(i)
-                                QMessageBox.information(self, "Voice Command", f"Switched to: {tab.browser.title()}")
-                                found = True
-                                break
-                    if not found:
-                        QMessageBox.information(self, "Voice Command", f"No tab found matching: {tab_name}")
-                    return
-        
-        # Navigation commands
-        elif "go back" in command or "back" in command:
-            self.go_back()
-            QMessageBox.information(self, "Voice Command", "Going back")
-            return
-            
-        elif "go forward" in command or "forward" in command:
-            self.go_forward()
-            QMessageBox.information(self, "Voice Command", "Going forward")
+        if self.voice_worker is not None and self.voice_worker.isRunning():
+            return  # Already listening
+        if self.stopping_listeners:
+            return  # A hands-free listener that is switching off still holds the microphone
+        self.voice_worker = VoiceCommandWorker(self.voice_backend, self)
+        self.voice_worker.state_changed.connect(self.show_voice_state)
+        self.voice_worker.recognized.connect(self.process_voice_command)
+        self.voice_worker.failed.connect(lambda message: self.toasts.post(message, "warning"))
+        self.voice_worker.finished.connect(partial(self.on_voice_worker_finished, self.voice_worker))
+        self.show_voice_state("calibrating")
+        self.voice_worker.start()
+
+    def on_voice_worker_finished(self, worker):
+        if self.voice_worker is worker:
+            self.voice_worker = None
+        worker.deleteLater()
+        self.reset_mic_button()
+
+    def toggle_hands_free(self):
+        """Switch continuous wake-phrase listening on or off"""
+        if self.wake_listener is not None:
+            listener, self.wake_listener = self.wake_listener, None
+            # Kept referenced until its thread finishes; anything it still hears is dropped
+            listener.state_changed.disconnect()
+            listener.recognized.disconnect()
+            listener.stop()
+            self.stopping_listeners.add(listener)
+            self.reset_mic_button()
             return
-            
-        elif "reload" in command or "refresh" in command:
-            self.reload_page()
-            QMessageBox.information(self, "Voice Command", "Page reloaded")
+        if self.stopping_listeners:
+            # The previous listener still holds the microphone
+            self.toasts.post("Hands-free mode is still switching off, try again in a moment")
             return
-            
-        elif "home" in command or "go home" in command:
-            self.go_home()
-            QMessageBox.information(self, "Voice Command", "Going to home page")
+        if not self.voice_backend.local_spotter:
+            # Never stream the microphone to an online service while waiting for the wake phrase
+            self.toasts.post("Hands-free mode needs offline speech recognition (Vosk or PocketSphinx)", "warning")
             return
-        
-        # Bookmark commands
-        elif "bookmark" in command or "add bookmark" in command:
-            self.toggle_bookmark()
-            QMessageBox.information(self, "Voice Command", "Bookmark toggled")
+        if self.voice_worker is not None and self.voice_worker.isRunning():
+            return  # Wait for the single command in progress
+        listener = WakeWordListener(self.voice_backend, parent=self)
+        listener.state_changed.connect(self.show_voice_state)
+        listener.recognized.connect(self.process_voice_command)
+        listener.failed.connect(lambda message: self.toasts.post(message, "warning"))
+        listener.finished.connect(partial(self.on_hands_free_finished, listener))
+        self.wake_listener = listener
+        listener.start()
+
+    def on_hands_free_finished(self, listener):
+        self.stopping_listeners.discard(listener)
+        if self.wake_listener is listener:
+            # Stopped by an error rather than by the user
+            self.wake_listener = None
+            self.reset_mic_button()
+        listener.deleteLater()
+
+    def show_voice_state(self, state):
+        """Reflect the voice capture stage on the mic button"""
+        text, tooltip = {
+            "waiting": ("👂", f"Hands-free: say '{self.wake_listener.wake_phrase if self.wake_listener else ''}' "
+                             "followed by a command, or click to speak"),
+            "calibrating": ("⏳", "Preparing microphone..."),
+            "listening": ("🔴", "Listening... Try 'Go to YouTube', 'Open new tab', 'Go back', "
+                                "'Reload page', 'Switch to dark mode' or 'Search for cats'"),
+            "recognizing": ("💭", "Recognizing..."),
+        }.get(state, ("🔴", "Listening..."))
+        self.mic_button.setIcon(QIcon())  # Clear icon when showing status text
+        self.mic_button.setText(text)
+        self.mic_button.setToolTip(tooltip)
+
+    def reset_mic_button(self):
+        mic_icon = self.load_svg_icon("microphone-solid.svg", size=(24, 24))
+        if mic_icon:
+            self.mic_button.setIcon(mic_icon)
+            self.mic_button.setText("")  # Clear any text when using icon
+        else:
+            self.mic_button.setText("🎤")
+        self.mic_button.setToolTip("Voice Command - Click to speak")
+
+    def process_voice_command(self, command):
+        """Dispatch a recognized command to its intent handler through the compiled command grammar"""
+        match = VOICE_COMMANDS.match(command)
+        if match is None:
+            self.toasts.post(f"Command not recognized: '{command}'. Try 'Go to YouTube', 'Open new tab', "
+                             "'Go back', 'Search for cats' or 'Switch to dark mode'", "warning")
             return
-            
-        # Theme commands - Enhanced dark mode voice recognition
-        elif any(phrase in command for phrase in [
-            "dark mode", "toggle dark mode", "switch to dark mode", "enable dark mode",
-            "turn on dark mode", "activate dark mode", "dark theme", "switch to dark theme",
-            "enable dark theme", "turn on dark theme", "night mode", "switch to night mode",
-            "enable night mode", "turn on night mode"
-        ]):
-            # If already in dark mode and user says "enable/turn on", inform them
-            if self.is_dark_mode and any(phrase in command for phrase in ["enable", "turn on", "activate", "switch to"]):
-                QMessageBox.information(self, "Voice Command", "Dark mode is already enabled!")
-                return
-            # If not in dark mode, or if they say "toggle", switch to dark mode
-            elif not self.is_dark_mode or "toggle" in command:
-                self.toggle_dark_mode_menu()
-                QMessageBox.information(self, "Voice Command", "Switched to dark mode")
-                return
-            # If already in dark mode and they say "dark mode" without toggle/enable, toggle off
-            else:
-                self.toggle_dark_mode_menu()
-                QMessageBox.information(self, "Voice Command", "Switched to light mode")
-                return
-                
-        # Light mode commands
-        elif any(phrase in command for phrase in [
-            "light mode", "switch to light mode", "enable light mode", "turn on light mode",
-            "activate light mode", "light theme", "switch to light theme", "enable light theme",
-            "turn on light theme", "day mode", "switch to day mode", "disable dark mode",
-            "turn off dark mode", "deactivate dark mode"
-        ]):
-            # If already in light mode and user says "enable/turn on", inform them
-            if not self.is_dark_mode and any(phrase in command for phrase in ["enable", "turn on", "activate", "switch to"]):
-                QMessageBox.information(self, "Voice Command", "Light mode is already enabled!")
-                return
-            # If in dark mode, or if they say "disable dark mode", switch to light mode
-            elif self.is_dark_mode or any(phrase in command for phrase in ["disable", "turn off", "deactivate"]):
-                self.toggle_dark_mode_menu()
-                QMessageBox.information(self, "Voice Command", "Switched to light mode")
-                return
-            # If already in light mode and they say "light mode", toggle to dark
-            else:
-                self.toggle_dark_mode_menu()
-                QMessageBox.information(self, "Voice Command", "Switched to dark mode")
-                return
-        
-        # Search commands
-        elif "search for" in command:
-            search_term = command.split("search for", 1)[1].strip()
-            if search_term:
-                search_url = f"https://www.google.com/search?q={search_term.replace(' ', '+')}"
-                self.url_input.setText(search_url)
-                self.navigate_to_url()
-                QMessageBox.information(self, "Voice Command", f"Searching for: {search_term}")
-                return
-        
-        # If no command matched
-        QMessageBox.information(self, "Voice Command", f"Command not recognized: '{command}'\n\nTry commands like:\n• 'Go to YouTube'\n• 'Open new tab'\n• 'Go back'\n• 'Search for cats'\n• 'Switch to dark mode'\n• 'Enable light mode'\n• 'Toggle dark theme'")
+        intent, slots = match
+        message = self.voice_handlers[intent](**slots)
+        if message:
+            self.toasts.post(message)
+
+    def create_voice_handlers(self):
+        """Handler per intent of voice_commands.COMMANDS; each returns the feedback message"""
+        return {
+            "navigate": self.voice_navigate,
+            "new_tab": partial(self.run_voice_action, self.add_new_tab, "New tab opened"),
+            "close_tab": self.voice_close_tab,
+            "switch_tab": self.voice_switch_tab,
+            "back": partial(self.run_voice_action, self.go_back, "Going back"),
+            "forward": partial(self.run_voice_action, self.go_forward, "Going forward"),
+            "reload": partial(self.run_voice_action, self.reload_page, "Page reloaded"),
+            "home": partial(self.run_voice_action, self.go_home, "Going to home page"),
+            "bookmark": partial(self.run_voice_action, self.toggle_bookmark, "Bookmark toggled"),
+            "dark_mode": partial(self.voice_set_theme, True),
+            "light_mode": partial(self.voice_set_theme, False),
+            "toggle_theme": self.voice_toggle_theme,
+            "search": self.voice_search,
+        }
+
+    def run_voice_action(self, action, message):
+        action()
+        return message
+
+    def voice_navigate(self, site):
+        # Handle common site shortcuts
+        self.url_input.setText(SITE_SHORTCUTS.get(site, site))
+        self.navigate_to_url()
+        return f"Navigating to: {site}"
+
+    def voice_close_tab(self):
+        if self.tabs.count() > 1:
+            self.close_tab(self.tabs.currentIndex())
+            return "Tab closed"
+        return "Cannot close the last tab"
+
+    def voice_switch_tab(self, tab):
+        for i in range(self.tabs.count()):
+            widget = self.tabs.widget(i)
+            if widget and (tab in widget.current_title().lower() or tab in widget.current_url().lower()):
+                self.tabs.setCurrentIndex(i)
+                return f"Switched to: {widget.current_title()}"
+        return f"No tab found matching: {tab}"
+
+    def voice_set_theme(self, dark):
+        name = "Dark" if dark else "Light"
+        if self.is_dark_mode == dark:
+            return f"{name} mode is already enabled!"
+        self.toggle_dark_mode_menu()
+        return f"Switched to {name.lower()} mode"
+
+    def voice_toggle_theme(self):
+        self.toggle_dark_mode_menu()
+        return f"Switched to {'dark' if self.is_dark_mode else 'light'} mode"
+
+    def voice_search(self, term):
+        self.url_input.setText(f"https://www.google.com/search?q={urllib.parse.quote_plus(term)}")
+        self.navigate_to_url()
+        return f"Searching for: {term}"
 
     def open_history(self):
         """Open enhanced browser history dialog"""
-        from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QTreeWidget, QTreeWidgetItem, 
+        from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QTreeView, 
                                     QPushButton, QHBoxLayout, QLabel, QLineEdit, QSplitter)
-        from PyQt5.QtGui import QPixmap, QIcon
+        from PyQt5.QtGui import QPixmap
         from PyQt5.QtCore import Qt
-        from datetime import datetime, timedelta
-        from collections import defaultdict
         
         dialog = QDialog(self)
         dialog.setWindowTitle("🕰️ Browser History")
@@ -1322,34 +2316,34 @@ class MainWindow(QMainWindow):
         header_layout.addLayout(search_layout)
         layout.addLayout(header_layout)
         
-        # History tree widget
-        history_tree = QTreeWidget()
-        history_tree.setHeaderLabels(["📄 Page", "🌐 URL", "⏰ Time"])
+        # History tree view backed by a lazily fetching model
+        history_tree = QTreeView()
+        history_tree.setUniformRowHeights(True)
         history_tree.setAlternatingRowColors(True)
         history_tree.setRootIsDecorated(True)
         history_tree.setStyleSheet("""
-            QTreeWidget {
+            QTreeView {
                 border: 1px solid #ddd;
                 border-radius: 10px;
                 background-color: white;
                 font-size: 14px;
                 selection-background-color: #e8f4fd;
             }
-            QTreeWidget::item {
+            QTreeView::item {
                 padding: 8px;
                 border-bottom: 1px solid #f1f2f6;
             }
-            QTreeWidget::item:hover {
+            QTreeView::item:hover {
                 background-color: #f8f9fa;
             }
-            QTreeWidget::item:selected {
+            QTreeView::item:selected {
                 background-color: #e8f4fd;
                 color: #2c3e50;
             }
-            QTreeWidget::branch:closed:has-children {
+            QTreeView::branch:closed:has-children {
                 image: url(data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAkAAAAJCAYAAADgkQYQAAAABHNCSVQICAgIfAhkiAAAAAlwSFlzAAAAdgAAAHYBTnsmCAAAABl0RVh0U29mdHdhcmUAd3d3Lmlua3NjYXBlLm9yZ5vuPBoAAAFYSURBVBiVpY+9SwJRFMWfc1+i0WgQhCBoaXBpCYKWaGkJGhqChoaGhqChoaGhIWhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhQUNDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NAAAAABJRU5ErkJggg==);
             }
-            QTreeWidget::branch:open:has-children {
+            QTreeView::branch:open:has-children {
                 image: url(data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAkAAAAJCAYAAADgkQYQAAAABHNCSVQICAgIfAhkiAAAAAlwSFlzAAAAdgAAAHYBTnsmCAAAABl0RVh0U29mdHdhcmUAd3d3Lmlua3NjYXBlLm9yZ5vuPBoAAAFYSURBVBiVpY+9SwJRFMWfc1+i0WgQhCBoaXBpCYKWaGkJGhqChoaGhqChoaGhIWhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhoaGhQUNDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NDQ0NAAAAABJRU5ErkJggg==);
             }
             QHeaderView::section {
@@ -1361,109 +2355,29 @@ class MainWindow(QMainWindow):
             }
         """)
         
-        # Collect and organize history
-        all_history = []
-        for i in range(self.tabs.count()):
-            tab = self.tabs.widget(i)
-            if tab and hasattr(tab, 'history'):
-                for entry in tab.history:
-                    if isinstance(entry, dict):
-                        all_history.append(entry)
-                    elif isinstance(entry, str):
-                        # Convert old string format to new dict format
-                        all_history.append({
-                            'url': entry,
-                            'title': entry,
-                            'timestamp': datetime.now(),
-                            'favicon': QIcon()
-                        })
+        history_model = HistoryModel(self.history_search, dialog)
+        history_tree.setModel(history_model)
         
-        # Group history by date
-        history_by_date = defaultdict(list)
-        today = datetime.now().date()
-        yesterday = today - timedelta(days=1)
-        
-        for entry in all_history:
-            entry_date = entry['timestamp'].date()
-            if entry_date == today:
-                date_key = "📅 Today"
-            elif entry_date == yesterday:
-                date_key = "📅 Yesterday"
-            elif entry_date > today - timedelta(days=7):
-                date_key = f"📅 {entry['timestamp'].strftime('%A')}"
-            else:
-                date_key = f"📅 {entry['timestamp'].strftime('%B %d, %Y')}"
-            
-            history_by_date[date_key].append(entry)
+        # Date groups start expanded
+        def on_rows_inserted(parent, first, last):
+            if not parent.isValid():
+                for row in range(first, last + 1):
+                    history_tree.expand(history_model.index(row, 0))
+        history_model.rowsInserted.connect(on_rows_inserted)
+        dialog.finished.connect(lambda _: self.history_search.results_ready.disconnect(history_model.on_results))
         
         def populate_tree(filter_text=""):
-            history_tree.clear()
-            
-            if not all_history:
-                no_history_item = QTreeWidgetItem(["No browsing history available", "", ""])
-                no_history_item.setFlags(no_history_item.flags() & ~Qt.ItemIsSelectable)
-                history_tree.addTopLevelItem(no_history_item)
-                return
-            
-            for date_group, entries in sorted(history_by_date.items(), 
-                                            key=lambda x: max(e['timestamp'] for e in x[1]), 
-                                            reverse=True):
-                # Filter entries based on search
-                filtered_entries = entries
-                if filter_text:
-                    filtered_entries = [e for e in entries 
-                                      if filter_text.lower() in e['title'].lower() or 
-                                         filter_text.lower() in e['url'].lower()]
-                
-                if not filtered_entries:
-                    continue
-                
-                # Create date group item
-                date_item = QTreeWidgetItem([date_group, "", ""])
-                date_item.setExpanded(True)
-                date_item.setFlags(date_item.flags() & ~Qt.ItemIsSelectable)
-                
-                # Style the date group
-                font = date_item.font(0)
-                font.setBold(True)
-                date_item.setFont(0, font)
-                
-                # Add entries under date group
-                for entry in sorted(filtered_entries, key=lambda x: x['timestamp'], reverse=True):
-                    time_str = entry['timestamp'].strftime('%I:%M %p')
-                    
-                    entry_item = QTreeWidgetItem([
-                        entry['title'][:60] + ("..." if len(entry['title']) > 60 else ""),
-                        entry['url'],
-                        time_str
-                    ])
-                    
-                    # Set favicon if available
-                    if hasattr(entry, 'favicon') and not entry['favicon'].isNull():
-                        entry_item.setIcon(0, entry['favicon'])
-                    else:
-                        entry_item.setIcon(0, QIcon("🌐"))
-                    
-                    # Store URL for navigation
-                    entry_item.setData(0, Qt.UserRole, entry['url'])
-                    
-                    # Add tooltip with full information
-                    entry_item.setToolTip(0, f"Title: {entry['title']}")
-                    entry_item.setToolTip(1, f"URL: {entry['url']}")
-                    entry_item.setToolTip(2, f"Visited: {entry['timestamp'].strftime('%c')}")
-                    
-                    date_item.addChild(entry_item)
-                
-                if date_item.childCount() > 0:
-                    history_tree.addTopLevelItem(date_item)
+            history_model.set_filter(filter_text)
         
-        # Search functionality
-        def on_search_changed():
-            populate_tree(search_box.text())
+        # Search functionality, debounced so typing doesn't query on every keystroke
+        search_timer = QTimer(dialog)
+        search_timer.setSingleShot(True)
+        search_timer.setInterval(200)
+        search_timer.timeout.connect(lambda: populate_tree(search_box.text()))
+        search_box.textChanged.connect(lambda _: search_timer.start())
         
-        search_box.textChanged.connect(on_search_changed)
-        
-        # Initial population
+        # Initial population; searches while typing read what is already committed
+        self.history_store.flush()  # Make sure the latest visits are committed
         populate_tree()
         
         # Set column widths
@@ -1574,29 +2488,27 @@ class MainWindow(QMainWindow):
         """)
         
         def visit_selected():
-            current_item = history_tree.currentItem()
-            if current_item and current_item.data(0, Qt.UserRole):
-                url = current_item.data(0, Qt.UserRole)
+            url = history_tree.currentIndex().data(Qt.UserRole)
+            if url:
                 self.url_input.setText(url)
                 self.navigate_to_url()
                 dialog.close()
         
         def delete_selected():
-            current_item = history_tree.currentItem()
-            if current_item and current_item.data(0, Qt.UserRole):
+            url_to_remove = history_tree.currentIndex().data(Qt.UserRole)
+            if url_to_remove:
                 from PyQt5.QtWidgets import QMessageBox
                 reply = QMessageBox.question(dialog, "Delete History Entry", 
                                            "Are you sure you want to delete this history entry?",
                                            QMessageBox.Yes | QMessageBox.No)
                 if reply == QMessageBox.Yes:
-                    url_to_remove = current_item.data(0, Qt.UserRole)
+                    self.history_store.delete_url(url_to_remove)
                     # Remove from all tabs
                     for i in range(self.tabs.count()):
                         tab = self.tabs.widget(i)
-                        if tab and hasattr(tab, 'history'):
-                            tab.history = [entry for entry in tab.history 
-                                         if (isinstance(entry, dict) and entry['url'] != url_to_remove) or
-                                            (isinstance(entry, str) and entry != url_to_remove)]
+                        if tab:
+                            tab.history.remove_url(url_to_remove)
+                            self.record_history_reset(tab)
                     populate_tree(search_box.text())
         
         def clear_all_history():
@@ -1605,12 +2517,13 @@ class MainWindow(QMainWindow):
                                        "⚠️ This will permanently delete your entire browsing history. Are you sure?",
                                        QMessageBox.Yes | QMessageBox.No)
             if reply == QMessageBox.Yes:
+                self.history_store.clear()
                 # Clear history from all tabs
                 for i in range(self.tabs.count()):
                     tab = self.tabs.widget(i)
-                    if tab and hasattr(tab, 'history'):
-                        tab.history = []
-                        tab.current_index = -1
+                    if tab:
+                        tab.history.clear()
+                        self.record_history_reset(tab)
                 dialog.close()
                 QMessageBox.information(self, "History Cleared", "✅ All browsing history has been cleared.")
         
@@ -1622,21 +2535,20 @@ class MainWindow(QMainWindow):
         
         # Enable buttons based on selection
         def on_selection_changed():
-            current_item = history_tree.currentItem()
-            has_selection = (current_item is not None and 
-                           current_item.data(0, Qt.UserRole) is not None)
+            has_selection = history_tree.currentIndex().data(Qt.UserRole) is not None
             visit_button.setEnabled(has_selection)
             delete_button.setEnabled(has_selection)
         
-        history_tree.itemSelectionChanged.connect(on_selection_changed)
+        history_tree.selectionModel().currentChanged.connect(on_selection_changed)
+        history_model.modelReset.connect(on_selection_changed)
         on_selection_changed()  # Initial state
         
         # Double-click to visit
-        def on_double_click(item, column):
-            if item and item.data(0, Qt.UserRole):
+        def on_double_click(index):
+            if index.data(Qt.UserRole):
                 visit_selected()
         
-        history_tree.itemDoubleClicked.connect(on_double_click)
+        history_tree.doubleClicked.connect(on_double_click)
         
         # Layout buttons
         button_layout.addWidget(visit_button)
@@ -1650,6 +2562,25 @@ class MainWindow(QMainWindow):
         # Show dialog
         dialog.exec_()
 
+    def closeEvent(self, event):
+        """Flush persistent state before the window goes away"""
+        self.session.compact(self.session_snapshot())
+        self.session.close()
+        self.favicon_cache.save_recency()
+        listeners = self.stopping_listeners | ({self.wake_listener} if self.wake_listener else set())
+        for listener in listeners:
+            listener.stop()
+        for listener in listeners:
+            listener.wait()
+        if self.voice_worker is not None:
+            self.voice_worker.stop()
+            self.voice_worker.wait()
+        # A model still loading can't be interrupted; the thread must finish before it is destroyed
+        self.voice_warmup.wait()
+        self.history_store.close()
+        self.bookmark_store.close()
+        super().closeEvent(event)
+
     def load_svg_icon(self, svg_filename, size=(24, 24), color=None):
         """Load an SVG file as a QIcon with optional color tinting"""
         try:
@@ -1671,7 +2602,9 @@ class MainWindow(QMainWindow):
 
   
 if __name__ == "__main__":
+    register_adapta_scheme()
     app = QApplication(sys.argv)
+    app.setApplicationName("Adapta")
     window = MainWindow()
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,108 @@
+import sys
+import urllib.parse
+from collections import deque
+from datetime import datetime
+
+
+class FaviconRegistry:
+    """One favicon per domain, shared by every history entry on that domain"""
+
+    def __init__(self):
+        self.icons = {}
+
+    def set(self, domain, icon):
+        self.icons[domain] = icon
+
+    def get(self, domain):
+        return self.icons.get(domain)
+
+
+favicons = FaviconRegistry()
+
+
+def url_domain(url):
+    """Lower-cased host of a URL, interned so entries on one domain share the string"""
+    return sys.intern(urllib.parse.urlsplit(url).netloc.lower())
+
+
+class NavigationEntry:
+    """A single back/forward history entry"""
+    __slots__ = ('url', 'title', 'timestamp', 'domain')
+
+    def __init__(self, url, title=None, timestamp=None):
+        self.url = url
+        self.title = title or url
+        self.timestamp = timestamp or datetime.now()
+        self.domain = url_domain(url)
+
+    @property
+    def favicon(self):
+        return favicons.get(self.domain)
+
+
+class NavigationHistory:
+    """Bounded back/forward list for one tab; the oldest entries fall off the front"""
+
+    def __init__(self, max_entries=500):
+        self.entries = deque(maxlen=max_entries)
+        self.index = -1
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def current(self):
+        if 0 <= self.index < len(self.entries):
+            return self.entries[self.index]
+        return None
+
+    def visit(self, entry):
+        """Add a new entry after the current one, dropping any forward history"""
+        while len(self.entries) > self.index + 1:
+            self.entries.pop()
+        # A full deque drops its first entry on append, which shifts the index left
+        if len(self.entries) == self.entries.maxlen:
+            self.index -= 1
+        self.entries.append(entry)
+        self.index = len(self.entries) - 1
+
+    def can_go_back(self):
+        return self.index > 0
+
+    def can_go_forward(self):
+        return self.index < len(self.entries) - 1
+
+    def back(self):
+        """Step back and return the entry to show, or None at the start"""
+        if not self.can_go_back():
+            return None
+        self.index -= 1
+        return self.entries[self.index]
+
+    def forward(self):
+        """Step forward and return the entry to show, or None at the end"""
+        if not self.can_go_forward():
+            return None
+        self.index += 1
+        return self.entries[self.index]
+
+    def remove_url(self, url):
+        """Drop every entry for a URL, keeping the current position where possible"""
+        removed_before = sum(1 for i, entry in enumerate(self.entries) if i <= self.index and entry.url == url)
+        self.entries = deque((entry for entry in self.entries if entry.url != url), maxlen=self.entries.maxlen)
+        self.index = min(self.index - removed_before, len(self.entries) - 1)
+        if self.entries and self.index < 0:
+            self.index = 0
+
+    def restore(self, entries, index):
+        """Replace the contents with saved entries, e.g. when a session is restored"""
+        self.entries = deque(entries, maxlen=self.entries.maxlen)
+        # Entries that didn't fit have fallen off the front
+        index -= len(entries) - len(self.entries)
+        self.index = max(-1, min(index, len(self.entries) - 1))
+
+    def clear(self):
+        self.entries.clear()
+        self.index = -1
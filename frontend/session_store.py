@@ -0,0 +1,178 @@
+import json
+import os
+import queue
+import threading
+
+
+class SessionJournal:
+    """Open tabs persisted as a snapshot plus an append-only journal of changes.
+
+    Every change (tab opened/closed/selected, visit, back/forward step, URL
+    replaced in place, title) is appended to the journal as one JSON line by a
+    background thread. Once enough records pile up, the GUI hands over a full
+    snapshot which replaces session.json atomically and starts a fresh journal. Snapshot and journal
+    carry a generation number so a crash between the two steps can't replay
+    records that the snapshot already contains.
+    """
+
+    COMPACT_AFTER = 1000
+    STOP = "stop"
+
+    def __init__(self, directory, max_entries=500):
+        self.snapshot_path = os.path.join(directory, "session.json")
+        self.journal_path = os.path.join(directory, "session.journal")
+        self.max_entries = max_entries
+        self.generation = 0
+        self.records_since_compaction = 0
+        self.queue = queue.Queue()
+        self.writer = None
+
+    # Loading
+
+    def load(self):
+        """Rebuild the last session as {'tabs': [...], 'current': tab id}"""
+        state = {'generation': 0, 'current': None, 'tabs': []}
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                state.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Error loading session snapshot: {e}")
+        self.generation = state['generation']
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            lines = []
+        if lines:
+            try:
+                header = json.loads(lines[0])
+            except ValueError:
+                header = {}
+            # A journal from another generation is already folded into the snapshot
+            if header.get('op') == 'begin' and header.get('generation') == self.generation:
+                for line in lines[1:]:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # Torn last line from a crash mid-write
+                    self.apply(state, record)
+        return state
+
+    def apply(self, state, record):
+        """Replay one journal record onto a session state"""
+        op = record.get('op')
+        if op == 'open':
+            state['tabs'].append({'id': record['id'], 'url': record.get('url'),
+                                  'title': record.get('title'), 'index': -1, 'entries': []})
+            return
+        if op == 'select':
+            state['current'] = record['id']
+            return
+        tab = next((t for t in state['tabs'] if t['id'] == record.get('id')), None)
+        if tab is None:
+            return
+        if op == 'close':
+            state['tabs'].remove(tab)
+        elif op == 'visit':
+            entries = tab['entries']
+            del entries[tab['index'] + 1:]
+            entries.append([record['url'], record['title'], record['timestamp']])
+            del entries[:-self.max_entries]
+            tab['index'] = len(entries) - 1
+            tab['url'] = record['url']
+            tab['title'] = record['title']
+        elif op == 'step':
+            tab['index'] = record['index']
+            if 0 <= tab['index'] < len(tab['entries']):
+                tab['url'], tab['title'] = tab['entries'][tab['index']][:2]
+        elif op == 'replace':
+            if 0 <= record['index'] < len(tab['entries']):
+                tab['entries'][record['index']][0] = record['url']
+                if record['index'] == tab['index']:
+                    tab['url'] = record['url']
+        elif op == 'title':
+            tab['title'] = record['title']
+            if 0 <= tab['index'] < len(tab['entries']):
+                tab['entries'][tab['index']][1] = record['title']
+        elif op == 'reset':
+            tab['entries'] = record['entries']
+            tab['index'] = record['index']
+
+    # Writing
+
+    def start(self, snapshot):
+        """Begin journaling on top of a fresh snapshot of the restored session"""
+        self.writer = threading.Thread(target=self.write_loop, name="session-writer", daemon=True)
+        self.writer.start()
+        self.compact(snapshot)
+
+    def record(self, op, **fields):
+        """Append a change to the journal (ignored until start() is called)"""
+        if self.writer is None:
+            return
+        fields['op'] = op
+        self.records_since_compaction += 1
+        self.queue.put(('append', fields))
+
+    def needs_compaction(self):
+        return self.records_since_compaction >= self.COMPACT_AFTER
+
+    def compact(self, snapshot):
+        """Replace the snapshot with the given state and start a new journal"""
+        if self.writer is None:
+            return
+        self.generation += 1
+        snapshot = dict(snapshot, generation=self.generation)
+        self.records_since_compaction = 0
+        self.queue.put(('compact', snapshot))
+
+    def close(self):
+        """Write out queued records and stop the writer thread"""
+        if self.writer is not None and self.writer.is_alive():
+            self.queue.put(self.STOP)
+            self.writer.join()
+
+    def write_loop(self):
+        journal = None
+        while True:
+            item = self.queue.get()
+            # Drain whatever else is queued so a burst of changes costs one flush
+            batch = [item]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                for item in batch:
+                    if item == self.STOP:
+                        continue
+                    kind, payload = item
+                    if kind == 'compact':
+                        if journal is not None:
+                            journal.close()
+                        journal = self.write_snapshot(payload)
+                    elif journal is not None:
+                        journal.write(json.dumps(payload, ensure_ascii=False) + "\n")
+                if journal is not None:
+                    journal.flush()
+            except (OSError, ValueError) as e:
+                print(f"Error writing session: {e}")
+            if self.STOP in batch:
+                break
+        if journal is not None:
+            journal.close()
+
+    def write_snapshot(self, snapshot):
+        """Atomically replace session.json, then open a new journal for its generation"""
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        journal = open(self.journal_path, 'w', encoding='utf-8')
+        journal.write(json.dumps({'op': 'begin', 'generation': snapshot['generation']}) + "\n")
+        return journal
@@ -0,0 +1,300 @@
+import json
+import os
+import threading
+import time
+
+import speech_recognition as sr
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from voice_commands import VOICE_COMMANDS, SITE_SHORTCUTS
+
+# Commands ending in free text (a site, tab name or search term) the grammar can't enumerate
+SLOT_PREFIXES = VOICE_COMMANDS.slot_phrases()
+
+
+def command_phrases():
+    """Every complete utterance the command set can enumerate, plus the bare slot prefixes"""
+    return VOICE_COMMANDS.vocabulary_phrases({"site": SITE_SHORTCUTS})
+
+
+class RecognizerBackend:
+    """Turns captured audio into lower-case text; raises sr.UnknownValueError or sr.RequestError"""
+    name = ""
+    # Whether spot() runs on this machine; hands-free mode would otherwise stream every
+    # utterance in the room to a remote service
+    local_spotter = False
+
+    def load(self):
+        """Do any expensive setup; called on the worker thread before the first recognition"""
+
+    def recognize(self, audio):
+        raise NotImplementedError
+
+    def spot(self, audio, phrase):
+        """Whether the audio contains a wake phrase; only offline backends implement this"""
+        raise NotImplementedError
+
+
+class GoogleBackend(RecognizerBackend):
+    """Google's web speech API; needs network access"""
+    name = "google"
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def recognize(self, audio):
+        return self.recognizer.recognize_google(audio).lower()
+
+
+class SphinxBackend(RecognizerBackend):
+    """CMU PocketSphinx through SpeechRecognition; offline, but reloads its models for every call"""
+    name = "sphinx"
+    local_spotter = True
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def recognize(self, audio):
+        return self.recognizer.recognize_sphinx(audio).lower()
+
+    # Keyword sensitivity from 0 to 1, turned into a PocketSphinx threshold of 1e(100*s-110):
+    # 0.85 is 1e-25, lenient enough to fire on the wake phrase without firing on every word
+    SPOT_SENSITIVITY = 0.85
+
+    def spot(self, audio, phrase):
+        """Keyword search only scores the wake phrase instead of decoding everything. It is
+        still slow: recognize_sphinx reloads the PocketSphinx models for every utterance"""
+        try:
+            return bool(self.recognizer.recognize_sphinx(
+                audio, keyword_entries=[(phrase, self.SPOT_SENSITIVITY)]).strip())
+        except sr.UnknownValueError:
+            return False
+
+
+class VoskBackend(RecognizerBackend):
+    """Offline Kaldi recognition with Vosk; the model is loaded once and kept in memory.
+
+    Audio is first decoded against a grammar of the known commands, which is
+    fast and robust. If that yields an unknown word or only a slot prefix such
+    as "search for", the same audio is decoded again without the grammar to
+    pick up the free text.
+    """
+    name = "vosk"
+    local_spotter = True
+    SAMPLE_RATE = 16000
+
+    def __init__(self, model_path, phrases=()):
+        self.model_path = model_path
+        self.grammar = json.dumps(list(phrases) + ["[unk]"]) if phrases else None
+        self.model = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        with self.lock:
+            if self.model is None:
+                import vosk
+                vosk.SetLogLevel(-1)
+                self.model = vosk.Model(self.model_path)
+
+    def transcribe(self, data, grammar=None):
+        import vosk
+        if grammar:
+            recognizer = vosk.KaldiRecognizer(self.model, self.SAMPLE_RATE, grammar)
+        else:
+            recognizer = vosk.KaldiRecognizer(self.model, self.SAMPLE_RATE)
+        recognizer.AcceptWaveform(data)
+        return json.loads(recognizer.FinalResult()).get("text", "").strip()
+
+    def recognize(self, audio):
+        self.load()
+        data = audio.get_raw_data(convert_rate=self.SAMPLE_RATE, convert_width=2)
+        text = self.transcribe(data, self.grammar) if self.grammar else ""
+        if not text or "[unk]" in text or text in SLOT_PREFIXES:
+            text = self.transcribe(data)
+        if not text:
+            raise sr.UnknownValueError()
+        return text.lower()
+
+    def spot(self, audio, phrase):
+        # A two-entry grammar decodes far faster than the full vocabulary
+        self.load()
+        data = audio.get_raw_data(convert_rate=self.SAMPLE_RATE, convert_width=2)
+        return phrase in self.transcribe(data, json.dumps([phrase, "[unk]"]))
+
+
+def create_recognizer_backend(data_dir):
+    """Backend named by ADAPTA_SPEECH_BACKEND, else Vosk when a model is installed, else Google.
+
+    The Vosk model directory is ADAPTA_VOSK_MODEL or <data dir>/vosk-model.
+    """
+    choice = os.environ.get("ADAPTA_SPEECH_BACKEND", "").lower()
+    model_path = os.environ.get("ADAPTA_VOSK_MODEL") or os.path.join(data_dir, "vosk-model")
+    if choice == "google":
+        return GoogleBackend()
+    if choice == "sphinx":
+        return SphinxBackend()
+    if choice == "vosk" or (not choice and os.path.isdir(model_path)):
+        try:
+            import vosk  # noqa: F401
+            return VoskBackend(model_path, command_phrases())
+        except ImportError as e:
+            print(f"Error loading offline speech recognition: {e}")
+    return GoogleBackend()
+
+
+class RecognizerWarmup(QThread):
+    """Load a backend's model in the background so the first command doesn't pay for it"""
+
+    def __init__(self, backend, parent=None):
+        super().__init__(parent)
+        self.backend = backend
+
+    def run(self):
+        try:
+            self.backend.load()
+        except Exception as e:
+            print(f"Error loading speech recognizer: {e}")
+
+
+class WakeWordListener(QThread):
+    """Hands-free mode: keep one microphone stream open and wait for a wake phrase.
+
+    Needs a backend with a local keyword spotter, which checks each utterance
+    first; only utterances containing the wake phrase get full recognition.
+    Words after the wake phrase are the command, otherwise the next utterance is.
+    The energy threshold adapts continuously while the room is quiet, so there
+    is no per-command calibration.
+    """
+    state_changed = pyqtSignal(str)  # "waiting", "listening", "recognizing"
+    recognized = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, backend, wake_phrase="hey browser", parent=None, phrase_time_limit=5):
+        super().__init__(parent)
+        self.backend = backend
+        self.wake_phrase = wake_phrase
+        self.phrase_time_limit = phrase_time_limit
+        self.running = False
+        self.armed = False  # Treat the next utterance as a command without the wake phrase
+
+    def stop(self):
+        """Ask the listener to close the stream; it exits within about a second"""
+        self.running = False
+
+    def arm(self):
+        """Skip the wake phrase for the next utterance, e.g. when the mic button is clicked"""
+        self.armed = True
+        self.state_changed.emit("listening")
+
+    def run(self):
+        recognizer = sr.Recognizer()
+        recognizer.dynamic_energy_threshold = True
+        self.running = True
+        try:
+            self.backend.load()
+            with sr.Microphone() as source:
+                recognizer.adjust_for_ambient_noise(source, duration=0.5)
+                self.state_changed.emit("waiting")
+                while self.running:
+                    try:
+                        # Short timeouts keep stop() responsive; silent periods feed the noise estimate
+                        audio = recognizer.listen(source, timeout=1, phrase_time_limit=self.phrase_time_limit)
+                    except sr.WaitTimeoutError:
+                        continue
+                    self.handle_utterance(audio, recognizer, source)
+        except Exception as e:
+            self.failed.emit(f"Hands-free voice control stopped: {e}")
+
+    def handle_utterance(self, audio, recognizer, source):
+        if self.armed:
+            self.armed = False
+            self.recognize_command(audio)
+            return
+        if not self.backend.spot(audio, self.wake_phrase):
+            return
+        self.state_changed.emit("recognizing")
+        try:
+            text = self.backend.recognize(audio)
+        except sr.UnknownValueError:
+            text = ""
+        except sr.RequestError as e:
+            self.failed.emit(f"Speech recognition service error: {e}")
+            self.state_changed.emit("waiting")
+            return
+        command = text.split(self.wake_phrase, 1)[1].strip() if self.wake_phrase in text else ""
+        if command:
+            self.recognized.emit(command)
+            self.state_changed.emit("waiting")
+            return
+        # Just the wake phrase: the command follows as the next utterance
+        self.state_changed.emit("listening")
+        try:
+            audio = recognizer.listen(source, timeout=5, phrase_time_limit=self.phrase_time_limit)
+        except sr.WaitTimeoutError:
+            self.state_changed.emit("waiting")
+            return
+        self.recognize_command(audio)
+
+    def recognize_command(self, audio):
+        self.state_changed.emit("recognizing")
+        try:
+            command = self.backend.recognize(audio)
+            print(f"Voice command received ({self.backend.name}): {command}")
+            self.recognized.emit(command)
+        except sr.UnknownValueError:
+            self.failed.emit("Could not understand the command. Please try again.")
+        except sr.RequestError as e:
+            self.failed.emit(f"Speech recognition service error: {e}")
+        self.state_changed.emit("waiting")
+
+
+class VoiceCommandWorker(QThread):
+    """Capture one spoken command and recognize it off the GUI thread"""
+    # Progress of the capture: "calibrating", "listening" or "recognizing"
+    state_changed = pyqtSignal(str)
+    recognized = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, backend, parent=None, timeout=8, phrase_time_limit=5):
+        super().__init__(parent)
+        self.backend = backend
+        self.timeout = timeout
+        self.phrase_time_limit = phrase_time_limit
+
+    def stop(self):
+        """Ask the worker to give up; it exits within about a second unless speech is being captured"""
+        self.requestInterruption()
+
+    def listen(self, recognizer, source):
+        """Wait up to timeout for speech in one-second steps so stop() stays responsive"""
+        deadline = time.monotonic() + self.timeout
+        while not self.isInterruptionRequested():
+            try:
+                return recognizer.listen(source, timeout=1, phrase_time_limit=self.phrase_time_limit)
+            except sr.WaitTimeoutError:
+                if time.monotonic() >= deadline:
+                    raise
+        return None
+
+    def run(self):
+        recognizer = sr.Recognizer()
+        try:
+            with sr.Microphone() as source:
+                self.state_changed.emit("calibrating")
+                recognizer.adjust_for_ambient_noise(source, duration=0.5)
+                self.state_changed.emit("listening")
+                audio = self.listen(recognizer, source)
+            if audio is None or self.isInterruptionRequested():
+                return
+            self.state_changed.emit("recognizing")
+            command = self.backend.recognize(audio)
+            print(f"Voice command received ({self.backend.name}): {command}")
+            self.recognized.emit(command)
+        except sr.WaitTimeoutError:
+            self.failed.emit("No speech detected. Please try again.")
+        except sr.UnknownValueError:
+            self.failed.emit("Could not understand the command. Please try again.")
+        except sr.RequestError as e:
+            self.failed.emit(f"Speech recognition service error: {e}")
+        except Exception as e:
+            self.failed.emit(f"An error occurred: {e}")
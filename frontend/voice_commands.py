@@ -0,0 +1,123 @@
+"""Voice command grammar: recognized text -> (intent, slots).
+
+Command phrases are compiled into a word trie. Fixed phrases ("go back") must
+cover the rest of the utterance; slot phrases ("search for") take the
+remaining words as their slot. Matching starts at the leftmost word that
+begins a command and prefers the longest phrase from there, so "open tab"
+beats "open <site>" and "go to tab <name>" beats "go to <site>" regardless of
+the order rules were added in. Cost depends on the utterance length, not on
+the number of commands.
+"""
+import re
+
+SITE_SHORTCUTS = {
+    "youtube": "https://www.youtube.com",
+    "google": "https://www.google.com",
+    "facebook": "https://www.facebook.com",
+    "twitter": "https://www.twitter.com",
+    "instagram": "https://www.instagram.com",
+    "reddit": "https://www.reddit.com",
+    "wikipedia": "https://www.wikipedia.org",
+    "github": "https://www.github.com",
+}
+
+# (intent, slot name or None, phrases)
+COMMANDS = [
+    ("new_tab", None, ["new tab", "open tab", "open new tab", "open a new tab", "open a tab"]),
+    ("close_tab", None, ["close tab", "close this tab", "close the tab", "close current tab"]),
+    ("switch_tab", "tab", ["switch to", "switch to tab", "go to tab"]),
+    ("navigate", "site", ["go to", "open", "navigate to", "visit"]),
+    ("back", None, ["go back", "back"]),
+    ("forward", None, ["go forward", "forward"]),
+    ("reload", None, ["reload", "refresh", "reload page", "refresh page", "reload the page", "refresh the page"]),
+    ("home", None, ["home", "go home", "home page", "go to home page"]),
+    ("bookmark", None, ["bookmark", "add bookmark", "bookmark this page", "bookmark page"]),
+    ("dark_mode", None, [
+        "switch to dark mode", "enable dark mode", "turn on dark mode", "activate dark mode",
+        "switch to dark theme", "enable dark theme", "turn on dark theme", "switch to night mode",
+        "enable night mode", "turn on night mode",
+    ]),
+    ("light_mode", None, [
+        "switch to light mode", "enable light mode", "turn on light mode", "activate light mode",
+        "switch to light theme", "enable light theme", "turn on light theme", "switch to day mode",
+        "disable dark mode", "turn off dark mode", "deactivate dark mode",
+    ]),
+    ("toggle_theme", None, [
+        "dark mode", "toggle dark mode", "dark theme", "toggle dark theme", "night mode",
+        "light mode", "light theme", "day mode", "toggle theme",
+    ]),
+    ("search", "term", ["search for", "search"]),
+]
+
+# Politeness around a command that carries no meaning
+TRAILING_FILLERS = {"please", "now", "thanks"}
+
+WORD_PATTERN = re.compile(r"[\w'.-]+")
+
+
+class CommandGrammar:
+    """Word trie of command phrases; each phrase end holds (intent, slot name)"""
+
+    def __init__(self, commands=()):
+        self.root = {}
+        self.phrases = []
+        for intent, slot, phrases in commands:
+            self.add(intent, phrases, slot)
+
+    def add(self, intent, phrases, slot=None):
+        """Register phrases for an intent; with a slot, the words after the phrase fill it"""
+        for phrase in phrases:
+            node = self.root
+            for word in phrase.split():
+                node = node.setdefault(word, {})
+            if None in node and node[None] != (intent, slot):
+                raise ValueError(f"Phrase '{phrase}' is already bound to {node[None][0]}")
+            node[None] = (intent, slot)
+            self.phrases.append((phrase, slot))
+
+    def words(self, command):
+        words = WORD_PATTERN.findall(command.lower())
+        while words and words[-1] in TRAILING_FILLERS:
+            words.pop()
+        return words
+
+    def match(self, command):
+        """(intent, slots) for the leftmost, longest command in the text, or None"""
+        words = self.words(command)
+        for start in range(len(words)):
+            best = None
+            node = self.root
+            for end in range(start, len(words)):
+                node = node.get(words[end])
+                if node is None:
+                    break
+                rule = node.get(None)
+                if rule is None:
+                    continue
+                intent, slot = rule
+                rest = words[end + 1:]
+                if slot is None and not rest:
+                    best = (intent, {})
+                elif slot is not None and rest:
+                    best = (intent, {slot: " ".join(rest)})
+            if best is not None:
+                return best
+        return None
+
+    def vocabulary_phrases(self, slot_values=None):
+        """Complete utterances for a constrained recognizer grammar; slot phrases are
+        expanded with any known values and also listed bare"""
+        slot_values = slot_values or {}
+        phrases = set()
+        for phrase, slot in self.phrases:
+            phrases.add(phrase)
+            for value in slot_values.get(slot, ()):
+                phrases.add(f"{phrase} {value}")
+        return sorted(phrases)
+
+    def slot_phrases(self):
+        """Phrases that expect free text after them"""
+        return {phrase for phrase, slot in self.phrases if slot is not None}
+
+
+VOICE_COMMANDS = CommandGrammar(COMMANDS)
@@ -0,0 +1,15 @@
+"""Time VOICE_COMMANDS.match over the test corpus: python tests/benchmark_voice_commands.py"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "frontend"))
+
+from voice_commands import VOICE_COMMANDS  # noqa: E402
+from test_voice_commands import EXAMPLES  # noqa: E402
+
+if __name__ == "__main__":
+    runs = 2000
+    utterances = [utterance for utterance, _ in EXAMPLES]
+    seconds = timeit.timeit(lambda: [VOICE_COMMANDS.match(u) for u in utterances], number=runs)
+    print(f"{seconds / (runs * len(utterances)) * 1e6:.1f} µs per command")
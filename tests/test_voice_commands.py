@@ -0,0 +1,44 @@
+import pytest
+
+from voice_commands import VOICE_COMMANDS
+
+# Utterance -> expected (intent, slots); benchmark_voice_commands.py times the same corpus
+EXAMPLES = [
+    ("go to youtube", ("navigate", {"site": "youtube"})),
+    ("open github", ("navigate", {"site": "github"})),
+    ("navigate to example.com", ("navigate", {"site": "example.com"})),
+    ("visit the new york times", ("navigate", {"site": "the new york times"})),
+    ("open tab", ("new_tab", {})),
+    ("open new tab", ("new_tab", {})),
+    ("new tab please", ("new_tab", {})),
+    ("close tab", ("close_tab", {})),
+    ("close this tab", ("close_tab", {})),
+    ("switch to github", ("switch_tab", {"tab": "github"})),
+    ("go to tab wikipedia", ("switch_tab", {"tab": "wikipedia"})),
+    ("go back", ("back", {})),
+    ("can you go back", ("back", {})),
+    ("back", ("back", {})),
+    ("go forward", ("forward", {})),
+    ("reload the page", ("reload", {})),
+    ("refresh", ("reload", {})),
+    ("go home", ("home", {})),
+    ("bookmark this page", ("bookmark", {})),
+    ("switch to dark mode", ("dark_mode", {})),
+    ("turn on night mode", ("dark_mode", {})),
+    ("dark mode", ("toggle_theme", {})),
+    ("toggle dark theme", ("toggle_theme", {})),
+    ("enable light mode", ("light_mode", {})),
+    ("turn off dark mode", ("light_mode", {})),
+    ("light mode", ("toggle_theme", {})),
+    ("search for cats", ("search", {"term": "cats"})),
+    ("search for how to bake bread", ("search", {"term": "how to bake bread"})),
+    ("Please search for Qt signals", ("search", {"term": "qt signals"})),
+    ("play some music", None),
+    ("", None),
+]
+
+
+
+@pytest.mark.parametrize("utterance, expected", EXAMPLES)
+def test_match(utterance, expected):
+    assert VOICE_COMMANDS.match(utterance) == expected